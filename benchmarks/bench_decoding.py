@@ -0,0 +1,66 @@
+import sys
+import time
+
+from degiroapi.decoding import decode_portfolio, decode_cashfunds, positions
+
+FIELDS = ('id', 'positionType', 'size', 'price', 'value', 'accruedInterest', 'plBase', 'todayPlBase',
+          'portfolioValueCorrection', 'breakEvenPrice', 'averageFxRate', 'realizedProductPl', 'realizedFxPl',
+          'todayRealizedProductPl', 'todayRealizedFxPl')
+
+
+def synthetic_portfolio(count):
+    items = []
+    for n in range(count):
+        values = {'id': str(n), 'positionType': 'CASH' if n % 50 == 0 else 'PRODUCT', 'size': float(n % 7),
+                  'price': 10.0 + n, 'value': 100.0 + n, 'breakEvenPrice': 9.5 + n}
+        items.append({'id': str(n), 'name': 'positionrow',
+                      'value': [{'name': name, 'value': values.get(name, 0.0)} for name in FIELDS]})
+    return {'portfolio': {'value': items}}
+
+
+def synthetic_cashfunds(count):
+    return {'cashFunds': {'value': [{'id': str(n), 'name': 'cashFund', 'value': [
+        {'name': 'id', 'value': n}, {'name': 'currencyCode', 'value': f'C{n:02d}'}, {'name': 'value', 'value': n * 1.5}]}
+        for n in range(count)]}}
+
+
+def legacy_portfolio(portfolio):
+    # the decoding loop of filterportfolio before the field-index map
+    data = []
+    for item in portfolio['portfolio']['value']:
+        positionType = size = price = value = breakEvenPrice = None
+        for i in item['value']:
+            size = i['value'] if i['name'] == 'size' else size
+            positionType = i['value'] if i['name'] == 'positionType' else positionType
+            price = i['value'] if i['name'] == 'price' else price
+            value = i['value'] if i['name'] == 'value' else value
+            breakEvenPrice = i['value'] if i['name'] == 'breakEvenPrice' else breakEvenPrice
+        data.append({"name": item['id'], "symbol": positionType, "positionType": positionType, "size": size,
+                     "price": price, "value": value, "breakEvenPrice": breakEvenPrice})
+    return data
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes=(1000, 10000, 100000)):
+    for size in sizes:
+        portfolio = synthetic_portfolio(size)
+        legacy = best_of(lambda: legacy_portfolio(portfolio))
+        decode = best_of(lambda: decode_portfolio(portfolio))
+        dicts = best_of(lambda: positions(decode_portfolio(portfolio), {}))
+        frame = best_of(lambda: positions(decode_portfolio(portfolio), {}, as_frame=True))
+        print(f'portfolio {size:>7} rows  legacy {legacy * 1000:8.2f} ms  decode {decode * 1000:8.2f} ms  '
+              f'decode+dicts {dicts * 1000:8.2f} ms  decode+frame {frame * 1000:8.2f} ms')
+    cashfunds = synthetic_cashfunds(100)
+    print(f'cashfunds     100 rows  decoder {best_of(lambda: decode_cashfunds(cashfunds)) * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(tuple(int(size) for size in sys.argv[1:]) or (1000, 10000, 100000))
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from degiroapi import DeGiro, Data, Interval, OrderRequest, Order
+from degiroapi.analytics import PortfolioAnalytics
+from standin import StandInConfig, StandInServer, load_recordings
+
+
+def client(server):
+    # the 503 responses of the stand-in are retried quickly, a benchmark should not measure the backoff sleeps
+    return DeGiro('standin', 'standin', trader_url=server.url, charting_url=server.url, backoff_factor=0.001)
+
+
+def portfolio_snapshot(server):
+    # a cold product cache: the portfolio and the product info of every position
+    degiro = client(server)
+    rows = degiro.getdata(Data.Type.PORTFOLIO, as_records=True)
+    degiro.close()
+    return len(rows)
+
+
+def bulk_product_info(server, count=1000):
+    degiro = client(server)
+    infos = degiro.products_info(list(range(1000, 1000 + count)))
+    degiro.close()
+    return len(infos)
+
+
+def price_history(server, count=20):
+    degiro = client(server)
+    series = degiro.price_history(list(range(1000, 1000 + count)), Interval.Type.Max, kind='ohlc', as_frame=False)
+    degiro.close()
+    return sum(len(array) for array in series.values())
+
+
+def order_placement(server, count=50):
+    degiro = client(server)
+    orders = [OrderRequest.buy(Order.Type.LIMIT, 1000 + n, 3, 1, limit=10.0) for n in range(count)]
+    results = degiro.place_orders(orders)
+    degiro.close()
+    # orders are not retried, with an error rate the failed ones do not count
+    return sum(result.ok for result in results)
+
+
+def portfolio_analytics(server):
+    # the snapshot, then the risk checks that run on every tick
+    degiro = client(server)
+    analytics = PortfolioAnalytics.from_degiro(degiro, base_currency='EUR')
+    degiro.close()
+    for _ in range(100):
+        analytics.update({analytics.ids[0]: {'price': 11.0}})
+        analytics.breaches(max_weight=0.05, max_exposure=0.5)
+        analytics.exposure('product_type')
+    return len(analytics.ids)
+
+
+def csv_parsing(server):
+    degiro = client(server)
+    df = degiro.transactions_csv('01/01/2025', '31/12/2025')
+    degiro.close()
+    return len(df)
+
+
+SCENARIOS = {
+    'portfolio_snapshot': portfolio_snapshot,
+    'bulk_product_info': bulk_product_info,
+    'price_history': price_history,
+    'order_placement': order_placement,
+    'portfolio_analytics': portfolio_analytics,
+    'csv_parsing': csv_parsing,
+}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def measure(scenario, server, repeat):
+    scenario(server)  # warm up the interpreter and the imports, not the client
+    timings = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = scenario(server)
+        timings.append(time.perf_counter() - start)
+    # the memory is measured on a separate run, tracemalloc slows the timed runs down
+    tracemalloc.start()
+    scenario(server)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'items': items,
+        'throughput': items / (sum(timings) / len(timings)),
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms', 'peak_kb'):
+            if result[metric] > previous[metric] * (1 + tolerance):
+                found.append(f'{name} {metric}: {previous[metric]:.2f} -> {result[metric]:.2f}')
+        if result['throughput'] < previous['throughput'] * (1 - tolerance):
+            found.append(f'{name} throughput: {previous["throughput"]:.2f} -> {result["throughput"]:.2f}')
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the DeGiro client against a local stand-in server')
+    parser.add_argument('scenarios', nargs='*', help=f'any of {", ".join(SCENARIOS)}, all of them by default')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='seconds of uniform jitter around the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of the responses answered with a 503')
+    parser.add_argument('--positions', type=int, default=300)
+    parser.add_argument('--series-points', type=int, default=5000)
+    parser.add_argument('--csv-rows', type=int, default=20000)
+    parser.add_argument('--recordings', help='directory of recorded responses to replay')
+    parser.add_argument('--save', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare with the results saved in this file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(unknown)}')
+
+    config = StandInConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           positions=args.positions, series_points=args.series_points, csv_rows=args.csv_rows,
+                           recordings=load_recordings(args.recordings) if args.recordings else None)
+    results = {}
+    with StandInServer(config) as server:
+        for name in args.scenarios or list(SCENARIOS):
+            result = results[name] = measure(SCENARIOS[name], server, args.repeat)
+            print(f'{name:<20} {result["items"]:>8} items  {result["throughput"]:>12.1f} items/s  '
+                  f'p50 {result["p50_ms"]:>9.2f} ms  p99 {result["p99_ms"]:>9.2f} ms  peak {result["peak_kb"]:>10.1f} KiB')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print(f'REGRESSION {regression}')
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class StandInConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, positions=300, products=2000, series_points=5000,
+                 csv_rows=20000, orders=500, transactions=2000, recordings=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.positions = positions
+        self.products = products
+        self.series_points = series_points
+        self.csv_rows = csv_rows
+        self.orders = orders
+        self.transactions = transactions
+        # recorded responses, a path prefix mapped to a body (dict/list sent as JSON, str sent as is)
+        self.recordings = recordings or {}
+        self.seed = seed
+
+
+def load_recordings(directory):
+    # <name>.json or <name>.csv files, the name is the path prefix with '/' replaced by '__'
+    recordings = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        prefix = '/' + os.path.splitext(name)[0].replace('__', '/')
+        with open(path) as f:
+            recordings[prefix] = json.load(f) if name.endswith('.json') else f.read()
+    return recordings
+
+
+class StandInServer:
+    ACCOUNT_ID = 1000001
+    CLIENT_ID = 4242
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or StandInConfig()
+        self.requests = 0
+        self.errors = 0
+        self.__lock = threading.Lock()
+        self.__sequence = 0
+        self.__confirmations = 0
+        self.__random = random.Random(self.config.seed)
+        server = self
+
+        class Handler(StandInHandler):
+            standin = server
+
+        self.__httpd = ThreadingHTTPServer((host, port), Handler)
+        self.__httpd.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self):
+        host, port = self.__httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def count(self):
+        # the random draws of one request: whether it fails and its latency
+        with self.__lock:
+            self.requests += 1
+            return self.__random.random(), self.__random.random()
+
+    def count_error(self):
+        with self.__lock:
+            self.errors += 1
+
+    def next_confirmation(self):
+        with self.__lock:
+            self.__confirmations += 1
+            return self.__confirmations
+
+    def next_sequence(self):
+        with self.__lock:
+            self.__sequence += 1
+            return self.__sequence
+
+    # synthetic payloads
+
+    def product(self, product_id):
+        product_id = int(product_id)
+        return {
+            'id': str(product_id), 'name': f'Product {product_id}', 'isin': f'XX{product_id:010d}',
+            'symbol': f'P{product_id}', 'currency': 'EUR' if product_id % 3 else 'USD', 'productTypeId': 1,
+            'productType': 'STOCK', 'tradable': True, 'closePrice': 10.0 + product_id % 97,
+            'closePriceDate': '2026-10-15', 'vwdId': str(360000000 + product_id), 'vwdIdSecondary': None,
+        }
+
+    def portfolio(self, token):
+        # a full portfolio for token 0, afterwards the price of a few positions changes
+        count = self.config.positions if token == 0 else min(5, self.config.positions)
+        rows = []
+        for n in range(count):
+            product_id = 1000 + n
+            rows.append({'id': str(product_id), 'name': 'positionrow', 'value': [
+                {'name': 'id', 'value': str(product_id)},
+                {'name': 'positionType', 'value': 'PRODUCT'},
+                {'name': 'size', 'value': float(n % 50 + 1)},
+                {'name': 'price', 'value': 10.0 + n % 97 + (token % 10) / 100},
+                {'name': 'value', 'value': (n % 50 + 1) * (10.0 + n % 97)},
+                {'name': 'breakEvenPrice', 'value': 9.5 + n % 97},
+            ]})
+        if token == 0:
+            rows.append({'id': 'EUR', 'name': 'positionrow', 'value': [
+                {'name': 'id', 'value': 'EUR'}, {'name': 'positionType', 'value': 'CASH'},
+                {'name': 'size', 'value': 1500.0}, {'name': 'price', 'value': 1}, {'name': 'value', 'value': 1500.0},
+                {'name': 'breakEvenPrice', 'value': 0}]})
+        return rows
+
+    def cashfunds(self):
+        return [{'id': str(n), 'name': 'cashFund', 'value': [
+            {'name': 'id', 'value': n}, {'name': 'currencyCode', 'value': currency},
+            {'name': 'value', 'value': 1000.0 * (n + 1)}]} for n, currency in enumerate(('EUR', 'USD', 'GBP'))]
+
+    def orders(self):
+        return [{'id': f'order-{n}', 'name': 'order', 'value': [
+            {'name': 'id', 'value': f'order-{n}'}, {'name': 'productId', 'value': 1000 + n % 50},
+            {'name': 'buysell', 'value': 'B' if n % 2 else 'S'}, {'name': 'size', 'value': 1.0},
+            {'name': 'price', 'value': 10.0}]} for n in range(min(self.config.orders, 50))]
+
+    def series(self, series_ids, period):
+        result = []
+        points = self.config.series_points
+        for series_id in series_ids:
+            kind = series_id.split(':', 1)[0]
+            if kind == 'issueid':
+                result.append({'type': 'object', 'id': series_id,
+                               'data': {'lastPrice': 10.0 + self.__random.random(), 'lastTime': '2026-10-16T12:00:00'}})
+            elif kind == 'ohlc':
+                result.append({'type': 'ohlc', 'id': series_id, 'times': '2000-01-01T00:00:00/P1D',
+                               'data': [[n, 10.0, 11.0, 9.0, 10.5] for n in range(points)]})
+            else:
+                result.append({'type': 'time', 'id': series_id, 'times': '2000-01-01T00:00:00/P1D',
+                               'data': [[n, 10.0 + (n % 100) / 10] for n in range(points)]})
+        return {'requestid': '1', 'start': '2000-01-01T00:00:00', 'end': '2026-10-16T00:00:00',
+                'resolution': 'P1D', 'series': result}
+
+    def csv_report(self):
+        lines = ['Date,Time,Product,ISIN,Quantity,Price,,Local value,,Value,,Exchange rate,Transaction costs,,Total,']
+        for n in range(self.config.csv_rows):
+            lines.append(f'{n % 28 + 1:02d}-{n % 12 + 1:02d}-2025,{n % 24:02d}:{n % 60:02d},PRODUCT {n % 500},'
+                         f'XX{n % 500:010d},{n % 50 + 1},"{10 + n % 97},5",EUR,"-{n % 1000},25",EUR,'
+                         f'"-{n % 1000},25",EUR,,"-0,50",EUR,"-{n % 1000},75",EUR')
+        return '\n'.join(lines) + '\n'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # the headers and the body are separate writes, with Nagle and delayed ACKs every keep-alive response stalls ~40ms
+    disable_nagle_algorithm = True
+    standin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.__handle('GET')
+
+    def do_POST(self):
+        self.__handle('POST')
+
+    def do_DELETE(self):
+        self.__handle('DELETE')
+
+    def __handle(self, method):
+        standin = self.standin
+        config = standin.config
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        error_draw, latency_draw = standin.count()
+        time.sleep(max(0.0, config.latency + config.jitter * (2 * latency_draw - 1)))
+
+        split = urlsplit(self.path)
+        path = split.path.split(';')[0]
+        # the login is not retried by the client, errors are only injected after it
+        if error_draw < config.error_rate and not path.startswith('/login/'):
+            standin.count_error()
+            return self.__send(503, {'errors': [{'text': 'stand-in error'}]})
+
+        query = parse_qs(split.query)
+        for prefix, recorded in config.recordings.items():
+            if path.startswith(prefix):
+                return self.__send(200, recorded)
+        try:
+            status, response = self.__route(method, path, query, body)
+        except Exception as error:
+            status, response = 500, {'errors': [{'text': repr(error)}]}
+        self.__send(status, response)
+
+    def __route(self, method, path, query, body):
+        standin = self.standin
+        if path in ('/login/secure/login', '/login/secure/login/totp'):
+            return 200, {'sessionId': f'STANDIN{standin.next_sequence()}', 'status': 0}
+        if path == '/pa/secure/client':
+            return 200, {'data': {'intAccount': StandInServer.ACCOUNT_ID, 'username': 'standin',
+                                  'firstContact': {'firstName': 'Stand', 'lastName': 'In'}, 'email': 'standin@local'}}
+        if path == '/login/secure/config':
+            return 200, {'data': {'clientId': StandInServer.CLIENT_ID}}
+        if path.startswith('/trading/secure/v5/update/'):
+            response = {}
+            for datatype, tokens in query.items():
+                token = int(tokens[0]) if tokens and tokens[0].lstrip('-').isdigit() else 0
+                if datatype == 'portfolio':
+                    response[datatype] = {'lastUpdated': token + 1, 'name': 'portfolio', 'value': standin.portfolio(token)}
+                elif datatype == 'cashFunds':
+                    response[datatype] = {'lastUpdated': token + 1, 'name': 'cashFunds',
+                                          'value': standin.cashfunds() if token == 0 else []}
+                elif datatype == 'orders':
+                    response[datatype] = {'lastUpdated': token + 1, 'name': 'orders',
+                                          'value': standin.orders() if token == 0 else []}
+            return 200, response
+        if path == '/product_search/secure/v5/products/info':
+            return 200, {'data': {str(p): standin.product(p) for p in json.loads(body or b'[]')}}
+        if path in ('/product_search/secure/v5/products/lookup', '/products_s/secure/v5/stocks'):
+            offset = int(query.get('offset', ['0'])[0])
+            limit = query.get('limit', [None])[0]
+            limit = int(limit) if limit else standin.config.products
+            ids = range(1000 + offset, 1000 + min(offset + limit, standin.config.products))
+            return 200, {'products': [standin.product(p) for p in ids], 'total': standin.config.products,
+                         'offset': offset}
+        if path == '/reporting/secure/v4/order-history':
+            return 200, {'data': [{'orderId': f'history-{n}', 'productId': 1000 + n % 50, 'created': '2026-10-01T10:00:00',
+                                   'buysell': 'B', 'size': 1, 'price': 10.0, 'isActive': n % 5 == 0}
+                                  for n in range(standin.config.orders)]}
+        if path == '/reporting/secure/v4/transactions':
+            return 200, {'data': [{'id': n, 'productId': 1000 + n % 50, 'date': '2026-10-01T10:00:00+02:00',
+                                   'buysell': 'B', 'price': 10.0, 'quantity': 1, 'total': -10.0}
+                                  for n in range(standin.config.transactions)]}
+        if path == '/reporting/secure/v6/accountoverview':
+            return 200, {'data': {'cashMovements': [{'id': n, 'date': '2026-10-01T10:00:00+02:00', 'type': 'CASH',
+                                                     'change': -10.0} for n in range(standin.config.transactions)]}}
+        if path.startswith('/reporting/secure/v3/ca/'):
+            return 200, {'data': {'lastOrder': 0, 'items': []}}
+        if path in ('/reporting/secure/v3/transactionReport/csv', '/reporting/secure/v3/cashAccountReport/csv'):
+            return 200, standin.csv_report()
+        if path == '/trading/secure/v5/checkOrder':
+            return 200, {'data': {'confirmationId': f'confirmation-{standin.next_confirmation()}',
+                                  'transactionFees': []}}
+        if path.startswith('/trading/secure/v5/order/'):
+            order = path[len('/trading/secure/v5/order/'):]
+            if method == 'DELETE':
+                return 200, {'data': {}}
+            return 200, {'data': {'orderId': order.replace('confirmation', 'order')}}
+        if path == '/trading/secure/logout':
+            return 200, {}
+        if path.startswith('/dgtbxdsservice/company-ratios/') or path.startswith(
+                '/dgtbxdsservice/company-profile/v2/'):
+            return 200, {'data': {'isin': path.rsplit('/', 1)[-1], 'currentRatios': {'ratiosGroups': []}}}
+        if path == '/hchart/v1/deGiro/data.js':
+            return 200, standin.series(query.get('series', []), query.get('period', ['P1D'])[0])
+        return 404, {'errors': [{'text': f'No stand-in for {method} {path}'}]}
+
+    def __send(self, status, response):
+        if isinstance(response, str):
+            body = response.encode()
+            content_type = 'text/csv'
+        else:
+            body = json.dumps(response).encode()
+            content_type = 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
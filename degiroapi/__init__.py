@@ -1,130 +1,301 @@
 import requests, json
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 import datetime
 import getpass
+import itertools
+import threading
+import time
+from degiroapi import endpoints
 from degiroapi.order import Order
 from degiroapi.client_info import ClientInfo
 from degiroapi.datatypes import Data
 from degiroapi.intervaltypes import Interval
-
-session = requests.Session()
+from degiroapi.cache import ProductCache
+from degiroapi.bulk import fetch_all, fetch_ordered
+from degiroapi.utils import date_windows
+from degiroapi.reports import read_report, report_decimal
+from degiroapi.orderbatch import OrderRequest, OrderResult
+from degiroapi.validation import OrderValidator, OrderValidationError
+from degiroapi.openorders import OpenOrderIndex
+from degiroapi.session_store import SessionStore
+from degiroapi.exceptions import DeGiroError, RequestError, LoginError, SessionExpiredError, RateLimitError, \
+    ServerError, request_error
+from degiroapi.decoding import decode_portfolio, decode_cashfunds, product_ids, positions, cash_balances
+from degiroapi.series import decode_series, period
+from degiroapi.instrumentation import RequestEvent, RequestMetrics, PrometheusExporter, OpenTelemetryExporter, \
+    endpoint
+from degiroapi.ratelimit import RequestScheduler, TokenBucket
 
 
 class DeGiro:
-    __LOGIN_URL = 'https://trader.degiro.nl/login/secure/login'
-    __LOGIN_TOTP_URL = 'https://trader.degiro.nl/login/secure/login/totp'
-    __CONFIG_URL = 'https://trader.degiro.nl/login/secure/config'
-
-    __LOGOUT_URL = 'https://trader.degiro.nl/trading/secure/logout'
-
-    __CLIENT_INFO_URL = 'https://trader.degiro.nl/pa/secure/client'
-
-    __GET_STOCKS_URL = 'https://trader.degiro.nl/products_s/secure/v5/stocks'
-    __PRODUCT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/lookup'
-    __PRODUCT_INFO_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/info'
-    __TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v4/transactions'
-    __TRANSACTIONS_CSV_URL = 'https://trader.degiro.nl/reporting/secure/v3/transactionReport/csv'
-    __ORDERS_URL = 'https://trader.degiro.nl/reporting/secure/v4/order-history'
-    __DIVIDENDS_URL = 'https://trader.degiro.nl/reporting/secure/v3/ca/'
-
-    __ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v6/accountoverview'
-    __ACCOUNT_CSV_URL = 'https://trader.degiro.nl/reporting/secure/v3/cashAccountReport/csv'
-    __PLACE_ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/checkOrder'
-    __ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/order/'
-
-    __DATA_URL = 'https://trader.degiro.nl/trading/secure/v5/update/'
-    __PRICE_DATA_URL = 'https://charting.vwdservices.com/hchart/v1/deGiro/data.js'
-
-    __COMPANY_RATIOS_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-ratios/'
-    __COMPANY_PROFILE = 'https://trader.degiro.nl/dgtbxdsservice/company-profile/v2/'
-
     __GET_REQUEST = 0
     __POST_REQUEST = 1
     __DELETE_REQUEST = 2
+    __METHODS = {__GET_REQUEST: 'GET', __POST_REQUEST: 'POST', __DELETE_REQUEST: 'DELETE'}
 
     client_token = any
     session_id = any
     client_info = any
     confirmation_id = any
 
-    def __init__(self, username=None, password=None, totp=None):
-        if username:  # Login prompt
-            self.login_prompt(username=username, password=password, totp=totp)
+    def __init__(self, username=None, password=None, totp=None, products_info_chunk_size=100,
+                 product_cache_size=10000, product_cache_ttl=3600, catalog=None, session=None, pool_connections=10,
+                 pool_maxsize=10, pool_block=False, timeout=30, retries=3, backoff_factor=0.3, session_store=None,
+                 trader_url=None, charting_url=None, hooks=None, scheduler=None):
+        # the hosts can be pointed at another server, e.g. the stand-in server of the benchmarks
+        self.__hosts = endpoints.hosts(trader_url, charting_url)
+        # callables receiving a RequestEvent after every request, e.g. a RequestMetrics or PrometheusExporter
+        self.hooks = list(hooks) if hooks else []
+        # a RequestScheduler throttles the requests per endpoint family and lets trading calls go first
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = 30
+        self.__login_lock = threading.Lock()
+        self.__failed_renewal = None
+        self.session = session if session is not None else self.__create_session(pool_connections, pool_maxsize,
+                                                                                 pool_block, retries, backoff_factor)
+        self.products_info_chunk_size = products_info_chunk_size
+        self.product_cache = ProductCache(product_cache_size, product_cache_ttl)
+        self.order_validator = OrderValidator(self.product_cache)
+        # the cash funds of the last full cash funds response, the orders are validated against them
+        self.__cash = None
+        # an UpdateTracker following the cash funds, it registers itself
+        self.tracker = None
+        self.catalog = catalog
+        self.session_store = session_store
+        self.__credentials = None
+        if username:
+            if self.resume(username):  # Saved session of this user, validated by the first request
+                if password:
+                    self.__credentials = (username, password)
+            else:  # Login prompt
+                self.login_prompt(username=username, password=password, totp=totp)
+
+    def resume(self, username=None):
+        saved = self.session_store.load() if self.session_store is not None else None
+        if not saved:
+            return False
+        # a store shared by several accounts only holds the last one, never continue the session of another user
+        if username is not None and saved.get('clientInfo', {}).get('username') != username:
+            return False
+        self.session_id = saved['sessionId']
+        self.client_token = saved['clientToken']
+        self.client_info = ClientInfo(saved['clientInfo'])
+        return True
 
     def login(self, username, password, totp=None):
-        login_payload = {
-            'username': username,
-            'password': password,
-            'isPassCodeReset': False,
-            'isRedirectToMobile': False
-        }
+        login_payload = endpoints.login_payload(username, password, totp)
         if totp is not None:
-            login_payload["oneTimePassword"] = totp
-            login_response = self.__request(DeGiro.__LOGIN_TOTP_URL, None, login_payload,
+            login_response = self.__request(endpoints.LOGIN_TOTP_URL, None, login_payload,
                                             request_type=DeGiro.__POST_REQUEST,
                                             error_message='Could not login.')
         else:
-            login_response = self.__request(DeGiro.__LOGIN_URL, None, login_payload, request_type=DeGiro.__POST_REQUEST,
-                                                error_message='Could not login.')
+            login_response = self.__request(endpoints.LOGIN_URL, None, login_payload,
+                                            request_type=DeGiro.__POST_REQUEST,
+                                            error_message='Could not login.')
 
         self.session_id = login_response['sessionId']
         client_info_payload = {'sessionId': self.session_id}
-        client_info_response = self.__request(DeGiro.__CLIENT_INFO_URL, None, client_info_payload,
-                                              error_message='Could not get client info.')
-        self.client_info = ClientInfo(client_info_response['data'])
-
         cookie = {
             'JSESSIONID': self.session_id
         }
-
-        client_token_response = self.__request(DeGiro.__CONFIG_URL, cookie=cookie, request_type=DeGiro.__GET_REQUEST,
-                                               error_message='Could not get client config.')
+        # the client info and the config only depend on the session id, fetch them at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            client_info_future = executor.submit(self.__request, endpoints.CLIENT_INFO_URL, None, client_info_payload,
+                                                 error_message='Could not get client info.')
+            client_token_future = executor.submit(self.__request, endpoints.CONFIG_URL, cookie=cookie,
+                                                  request_type=DeGiro.__GET_REQUEST,
+                                                  error_message='Could not get client config.')
+            client_info_response = client_info_future.result()
+            client_token_response = client_token_future.result()
+        self.client_info = ClientInfo(client_info_response['data'])
         self.client_token = client_token_response['data']['clientId']
 
+        # a one-time password can not be reused, only plain credentials allow a transparent re-login
+        self.__credentials = (username, password) if totp is None else None
+        if self.session_store is not None:
+            self.session_store.save(self.session_id, self.client_token, self.client_info.to_dict())
+
         return client_info_response
 
     def login_prompt(self, username=None, password=None, totp=None):
 
         if not username: username = input("Username: ")
         if not password: password = getpass.getpass("Password:")
+        if totp:
+            return self.login(username, password, totp)
         try:
-            self.login(username, password)
+            return self.login(username, password)
         except Exception:
             totp = getpass.getpass("totp (Leave empty if none):")
-            self.login(username, password, totp)
-
-        return self.login(username, password, totp or None)
+            return self.login(username, password, totp or None)
 
     def logout(self):
-        logout_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        self.__request(DeGiro.__LOGOUT_URL + ';jsessionid=' + self.session_id, None, logout_payload,
+        self.__request(endpoints.session_url(endpoints.LOGOUT_URL, self.session_id), None, self.__account_payload(),
                        error_message='Could not log out')
+        self.__credentials = None
+        if self.session_store is not None:
+            self.session_store.clear()
 
     @staticmethod
-    def __request(url, cookie=None, payload=None, headers=None, data=None, post_params=None, request_type=__GET_REQUEST,
-                  csv=False, error_message='An error occurred.'):
-
+    def __create_session(pool_connections, pool_maxsize, pool_block, retries, backoff_factor):
+        # pool_connections is the number of hosts kept in the pool, pool_maxsize the connections per host
+        # only connection errors of GET requests are retried here, the 429 and 5xx responses are retried by __request
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status=0, allowed_methods=frozenset(['GET']),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def __send(self, url, cookie, payload, headers, data, post_params, request_type, stream):
+        url = endpoints.rewrite(url, self.__hosts)
+        session = self.session
+        timeout = self.timeout
         if request_type == DeGiro.__DELETE_REQUEST:
-            response = session.delete(url, json=payload)
+            return session.delete(url, json=payload, timeout=timeout)
         elif request_type == DeGiro.__GET_REQUEST and cookie:
-            response = session.get(url, cookies=cookie)
+            return session.get(url, cookies=cookie, timeout=timeout)
         elif request_type == DeGiro.__GET_REQUEST:
-            response = session.get(url, params=payload)
+            return session.get(url, params=payload, timeout=timeout, stream=stream)
         elif request_type == DeGiro.__POST_REQUEST and headers and data:
-            response = session.post(url, headers=headers, params=payload, data=data)
+            return session.post(url, headers=headers, params=payload, data=data, timeout=timeout)
         elif request_type == DeGiro.__POST_REQUEST and post_params:
-            response = session.post(url, params=post_params, json=payload)
+            return session.post(url, params=post_params, json=payload, timeout=timeout)
         elif request_type == DeGiro.__POST_REQUEST:
-            response = session.post(url, json=payload)
+            return session.post(url, json=payload, timeout=timeout)
         else:
             raise Exception(f'Unknown request type: {request_type}')
 
+    def __renew_session(self, expired_session_id):
+        # single flight: the threads that saw the same expired session wait for one login instead of each logging in
+        failed = self.__failed_renewal
+        with self.__login_lock:
+            if self.session_id != expired_session_id:
+                return
+            # the login failed while this thread was waiting for it, the same error is raised instead of logging in
+            # again for every waiting thread
+            if self.__failed_renewal is not failed and self.__failed_renewal[0] == expired_session_id:
+                raise self.__failed_renewal[1]
+            if self.__credentials is None:
+                return
+            try:
+                self.login(*self.__credentials)
+            except Exception as error:
+                self.__failed_renewal = (expired_session_id, error)
+                if isinstance(error, LoginError):
+                    # the credentials are rejected, retrying them can lock the account
+                    self.__credentials = None
+                raise
+
+    def __backoff(self, response, attempt):
+        retry_after = response.headers.get('Retry-After') if response.headers else None
+        return endpoints.retry_delay(retry_after, attempt, self.backoff_factor, self.max_backoff)
+
+    def __account_payload(self, **fields):
+        return endpoints.account_payload(self.client_info.account_id, self.session_id, **fields)
+
+    def __data_url(self):
+        return endpoints.data_url(self.client_info.account_id, self.session_id)
+
+    def __request(self, url, cookie=None, payload=None, headers=None, data=None, post_params=None,
+                  request_type=__GET_REQUEST, csv=False, error_message='An error occurred.', idempotent=None):
+        hooks = self.hooks
+        if not hooks:
+            return self.__perform(url, cookie, payload, headers, data, post_params, request_type, csv, error_message,
+                                  idempotent, None)
+        # one event per call, the retries and the session renewal included
+        event = RequestEvent(endpoint(url), DeGiro.__METHODS.get(request_type))
+        start = time.perf_counter()
+        try:
+            return self.__perform(url, cookie, payload, headers, data, post_params, request_type, csv, error_message,
+                                  idempotent, event)
+        except Exception as error:
+            event.error = type(error).__name__
+            raise
+        finally:
+            event.duration = time.perf_counter() - start
+            for hook in hooks:
+                hook(event)
+
+    def __perform(self, url, cookie, payload, headers, data, post_params, request_type, csv, error_message,
+                  idempotent, event):
+        login = url in endpoints.LOGIN_URLS
+        # the requests of login() itself never renew the session, the renewing thread holds the login lock
+        renewable = url not in endpoints.SESSION_URLS
+        if idempotent is None:
+            idempotent = request_type == DeGiro.__GET_REQUEST
+        renewed = False
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                waited = self.scheduler.acquire(url)
+                if event is not None:
+                    event.queue_time += waited
+            response = self.__send(url, cookie, payload, headers, data, post_params, request_type, callable(csv))
+            status = response.status_code
+            if event is not None:
+                event.status_code = status
+                event.request_bytes += len(response.request.body or b'') if response.request is not None else 0
+
+            # an expired (or resumed and no longer valid) session is renewed once with the known credentials
+            if status == 401 and not renewed and renewable and self.__credentials is not None \
+                    and isinstance(self.session_id, str):
+                response.close()
+                old = self.session_id
+                self.__renew_session(old)
+                url, cookie, payload, post_params = (endpoints.replace_session(v, old, self.session_id)
+                                                     for v in (url, cookie, payload, post_params))
+                renewed = True
+                if event is not None:
+                    event.retries += 1
+                continue
+
+            if (status == 429 or status >= 500) and idempotent and attempt < self.retries:
+                response.close()
+                time.sleep(self.__backoff(response, attempt))
+                attempt += 1
+                if event is not None:
+                    event.retries += 1
+                continue
+            break
+
+        if event is not None and not callable(csv):
+            event.response_bytes = len(response.content)
+            decode_start = time.perf_counter()
+            try:
+                return self.__decode(response, csv, error_message, url, login)
+            finally:
+                event.decode_time = time.perf_counter() - decode_start
+        return self.__decode(response, csv, error_message, url, login, event)
+
+    @staticmethod
+    def __decode(response, csv, error_message, url, login, event=None):
         if response.status_code == 200 or response.status_code == 201:
+            if callable(csv):
+                # parse the body while it is downloaded instead of decoding a full text copy first
+                with response:
+                    response.raw.decode_content = True
+                    if event is None:
+                        return csv(response.raw)
+                    decode_start = time.perf_counter()
+                    try:
+                        return csv(response.raw)
+                    finally:
+                        event.decode_time = time.perf_counter() - decode_start
+                        event.response_bytes = response.raw.tell()
             if csv == True:
+                import pandas as pd
                 try:
                     df = pd.read_csv(StringIO(response.text))
                     return df
@@ -133,315 +304,364 @@ class DeGiro:
             try:
                 return response.json()
             except ValueError:
+                import pandas as pd
                 df = pd.read_csv(StringIO(response.text))
                 return df
             except:
                 return "No data"
         else:
-            raise Exception(f'{error_message} Response: {response.text}')
-
-    def search_products(self, search_text, limit=1):
-        product_search_payload = {
-            'searchText': search_text,
-            'limit': limit,
-            'offset': 0,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__PRODUCT_SEARCH_URL, None, product_search_payload,
-                              error_message='Could not get products.')['products']
+            raise request_error(f'{error_message} Response: {response.text}', response.status_code, url, response.text,
+                                login)
+
+    def __search_page(self, search_text, offset, limit, require_total=False):
+        product_search_payload = endpoints.search_payload(self.client_info.account_id, self.session_id, search_text,
+                                                          offset, limit, require_total)
+        page = self.__request(endpoints.PRODUCT_SEARCH_URL, None, product_search_payload,
+                              error_message='Could not get products.')
+        if self.catalog is not None:
+            self.catalog.add(page.get('products') or [])
+        return page
+
+    def search_products(self, search_text, limit=1, offset=0):
+        return self.__search_page(search_text, offset, limit)['products']
+
+    def iter_search_products(self, search_text, page_size=100, prefetch=2):
+        return self.__paginate(lambda offset: self.__search_page(search_text, offset, page_size, offset == 0),
+                               page_size, prefetch)
+
+    def __paginate(self, fetch, page_size, prefetch):
+        # the first page tells the total, the next pages are fetched while the caller consumes the current one
+        first = fetch(0)
+        products = first.get('products') or []
+        yield from products
+        if len(products) < page_size:
+            return
+        total = first.get('total')
+        offsets = range(page_size, total, page_size) if total is not None else itertools.count(page_size, page_size)
+        pages = fetch_ordered(fetch, offsets, prefetch)
+        try:
+            for page in pages:
+                products = page.get('products') or []
+                yield from products
+                # without a total the end is the first page that is not full
+                if len(products) < page_size:
+                    break
+        finally:
+            pages.close()
 
     def product_info(self, product_id):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__PRODUCT_INFO_URL, None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=json.dumps([str(product_id)]),
-                              request_type=DeGiro.__POST_REQUEST,
-                              error_message='Could not get product info.')['data'][str(product_id)]
-
-    def transactions(self, from_date, to_date, group_transactions=False):
-        transactions_payload = {
-            'fromDate': self.validate(from_date),
-            'toDate': self.validate(to_date),
-            'group_transactions_by_order': group_transactions,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__TRANSACTIONS_URL, None, transactions_payload,
+        return self.products_info([product_id])[str(product_id)]
+
+    def __transactions(self, from_date, to_date, group_transactions=False):
+        transactions_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date,
+                                                      to_date, group_transactions_by_order=group_transactions)
+        return self.__request(endpoints.TRANSACTIONS_URL, None, transactions_payload,
                               error_message='Could not get transactions.')['data']
 
-    def account_overview(self, from_date, to_date):
-        account_payload = {
-            'fromDate': self.validate(from_date),
-            'toDate': self.validate(to_date),
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__ACCOUNT_URL, None, account_payload,
+    def iter_transactions(self, from_date, to_date, group_transactions=False, window_days=365, max_workers=4):
+        return self.__windowed(lambda start, end: self.__transactions(start, end, group_transactions),
+                               from_date, to_date, window_days, max_workers)
+
+    def transactions(self, from_date, to_date, group_transactions=False, window_days=365, max_workers=4):
+        return list(self.iter_transactions(from_date, to_date, group_transactions, window_days, max_workers))
+
+    def __account_overview(self, from_date, to_date):
+        account_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date, to_date)
+        return self.__request(endpoints.ACCOUNT_URL, None, account_payload,
                               error_message='Could not get account overview.')['data']
 
-    def orders(self, from_date, to_date, not_executed=None):
-        orders_payload = {
-            'fromDate': from_date.strftime('%d/%m/%Y'),
-            'toDate': to_date.strftime('%d/%m/%Y'),
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        # max 90 days
-        if (to_date - from_date).days > 90:
-            raise Exception('The maximum timespan is 90 days')
-        data = self.__request(DeGiro.__ORDERS_URL, None, orders_payload, error_message='Could not get orders.')['data']
-        data_not_executed = []
-        if not_executed:
-            for d in data:
-                if d['isActive']:
-                    data_not_executed.append(d)
-            return data_not_executed
-        else:
-            return data
+    def iter_cash_movements(self, from_date, to_date, window_days=365, max_workers=4):
+        return self.__windowed(lambda start, end: self.__account_overview(start, end).get('cashMovements', []),
+                               from_date, to_date, window_days, max_workers)
 
-    def delete_order(self, orderId):
-        delete_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
+    def account_overview(self, from_date, to_date, window_days=365, max_workers=4):
+        return {'cashMovements': list(self.iter_cash_movements(from_date, to_date, window_days, max_workers))}
+
+    def __orders(self, from_date, to_date):
+        orders_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date, to_date)
+        return self.__request(endpoints.ORDERS_URL, None, orders_payload, error_message='Could not get orders.')['data']
 
-        return self.__request(DeGiro.__ORDER_URL + orderId + ';jsessionid=' + self.session_id, None,
-                              delete_order_params,
+    def iter_orders(self, from_date, to_date, not_executed=None, max_workers=4):
+        for order in self.__windowed(self.__orders, from_date, to_date, endpoints.ORDERS_WINDOW_DAYS, max_workers):
+            if not not_executed or order['isActive']:
+                yield order
+
+    def orders(self, from_date, to_date, not_executed=None, max_workers=4):
+        return list(self.iter_orders(from_date, to_date, not_executed, max_workers))
+
+    def __windowed(self, fetch, from_date, to_date, days, max_workers):
+        # the windows are fetched concurrently but yielded in order, they do not overlap so no record is repeated
+        windows = date_windows(endpoints.to_datetime(from_date), endpoints.to_datetime(to_date), days)
+        for records in fetch_ordered(lambda window: fetch(*window), windows, max_workers):
+            yield from records
+
+    def delete_order(self, orderId):
+        return self.__request(endpoints.session_url(endpoints.ORDER_URL + orderId, self.session_id), None,
+                              self.__account_payload(),
                               request_type=DeGiro.__DELETE_REQUEST,
                               error_message='Could not delete order' + " " + orderId)
 
+    def open_orders(self, days=90):
+        index = OpenOrderIndex()
+        now = datetime.datetime.now()
+        index.load(self.iter_orders(now - datetime.timedelta(days=days), now, not_executed=True))
+        return index
+
+    def cancel_orders(self, order_ids=None, product_id=None, predicate=None, index=None, max_workers=8):
+        # without explicit ids the orders are selected from the open order index (fetched when not given)
+        if order_ids is None:
+            if index is None:
+                index = self.open_orders()
+            if product_id is not None:
+                order_ids = [str(order.get('id') or order.get('orderId')) for order in index.by_product(product_id)]
+            elif predicate is not None:
+                order_ids = index.select(predicate)
+            else:
+                order_ids = index.order_ids()
+        results = list(fetch_all(self.delete_order, [str(order_id) for order_id in order_ids], max_workers))
+        if index is not None:
+            for result in results:
+                if result.ok:
+                    index.remove(result.key)
+        return results
+
     @staticmethod
-    def filtercashfunds(cashfunds):
-        data = []
-        for item in cashfunds['cashFunds']['value']:
-            if item['value'][2]['value'] != 0:
-                data.append(item['value'][1]['value'] + " " + str(item['value'][2]['value']))
-        return data
+    def filtercashfunds(cashfunds, as_frame=False):
+        columns = decode_cashfunds(cashfunds)
+        if as_frame:
+            import pandas as pd
+            return pd.DataFrame({'currency': columns['currencyCode'], 'value': pd.to_numeric(columns['value'])})
+        return [currency + " " + str(value) for currency, value in zip(columns['currencyCode'], columns['value'])
+                if value != 0]
 
-    def filterportfolio(self, portfolio, filter_zero=None):
-        data = []
-        data_non_zero = []
-        for item in portfolio['portfolio']['value']:
-            positionType = size = price = value = breakEvenPrice = None
-            for i in item['value']:
-                size = i['value'] if i['name'] == 'size' else size
-                positionType = i['value'] if i['name'] == 'positionType' else positionType
-                price = i['value'] if i['name'] == 'price' else price
-                value = i['value'] if i['name'] == 'value' else value
-                breakEvenPrice = i['value'] if i['name'] == 'breakEvenPrice' else breakEvenPrice
-            if item['value'][1]['value'] != 'CASH':
-                info = self.product_info(item['id'])
-            else:
-                info = []
-            data.append({
-                "name": info['name'] if 'name' in info else item['id'],
-                "symbol": info['symbol'] if 'symbol' in info else positionType,
-                "positionType": info['productType'] if 'productType' in info else positionType,
-                "size": size,
-                "price": price,
-                "value": value,
-                "breakEvenPrice": breakEvenPrice
-            })
-        if filter_zero:
-            for d in data:
-                if d['size'] != 0.0:
-                    data_non_zero.append(d)
-            return data_non_zero
-        else:
-            return data
+    @staticmethod
+    def cash_balances(cashfunds):
+        return cash_balances(decode_cashfunds(cashfunds))
+
+    def filterportfolio(self, portfolio, filter_zero=None, as_records=False, as_frame=False):
+        columns = decode_portfolio(portfolio)
+        ids = product_ids(columns)
+        infos = self.products_info(ids) if ids else {}
+        return positions(columns, infos, filter_zero, as_records, as_frame)
 
-    def getdata(self, datatype, filter_zero=None):
+    def getdata(self, datatype, filter_zero=None, as_records=False, as_frame=False):
         data_payload = {
             datatype: 0
         }
 
         if datatype == Data.Type.CASHFUNDS:
-            return self.filtercashfunds(
-                self.__request(DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id,
-                               None,
-                               data_payload,
-                               error_message='Could not get data'))
+            return self.filtercashfunds(self.update(data_payload), as_frame)
         elif datatype == Data.Type.PORTFOLIO:
             return self.filterportfolio(
-                self.__request(DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id,
+                self.__request(self.__data_url(),
                                None,
                                data_payload,
-                               error_message='Could not get data'), filter_zero)
+                               error_message='Could not get data'), filter_zero, as_records, as_frame)
         else:
             return self.__request(
-                DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id, None,
+                self.__data_url(), None,
                 data_payload,
                 error_message='Could not get data')
 
-    def real_time_price(self, product_id, interval):
-        vw_id = self.product_info(product_id)['vwdId']
-        tmp = vw_id
-        try:
-            int(tmp)
-        except:
-            vw_id = self.product_info(product_id)['vwdIdSecondary']
-
-        price_payload = {
-            'requestid': 1,
-            'period': interval,
-            'series': ['issueid:' + vw_id, 'price:issueid:' + vw_id],
-            'userToken': self.client_token
-        }
+    def update(self, tokens):
+        # tokens maps a datatype to the lastUpdated value of its previous response, 0 requests the full state
+        response = self.__request(self.__data_url(), None, dict(tokens), error_message='Could not get data')
+        if tokens.get(Data.Type.CASHFUNDS) == 0 and isinstance(response, dict) \
+                and isinstance(response.get(Data.Type.CASHFUNDS), dict):
+            self.__cash = cash_balances(decode_cashfunds(response))
+        return response
+
+    def __order_cash(self):
+        # the cash the orders are validated against: order_validator.cash when set, else the cash funds of the
+        # tracker or of the last full response, fetched when none is known
+        if self.order_validator.cash is not None:
+            return self.order_validator.cash
+        tracker = self.tracker
+        if tracker is not None and tracker.tokens.get(Data.Type.CASHFUNDS):
+            return tracker.cash_balances()
+        if self.__cash is None:
+            try:
+                self.update({Data.Type.CASHFUNDS: 0})
+            except (RateLimitError, ServerError, requests.ConnectionError, requests.Timeout):
+                # without the cash the orders are still checked, only not against the cash
+                pass
+        return self.__cash
 
-        return self.__request(DeGiro.__PRICE_DATA_URL, None, price_payload,
-                             error_message='Could not get real time price')['series']
+    def vwd_id(self, product_id):
+        return endpoints.vwd_id(self.product_info(product_id))
 
-    def buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
-        place_buy_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        place_buy_order_payload = {
-            'buySell': "BUY",
-            'orderType': orderType,
-            'productId': productId,
-            'timeType': timeType,
-            'size': size,
-            'price': limit,
-            'stopPrice': stop_loss,
-        }
-        if orderType != Order.Type.STOPLIMIT and orderType != Order.Type.MARKET \
-                and orderType != Order.Type.LIMIT and orderType != Order.Type.STOPLOSS:
-            raise Exception('Invalid order type')
+    def vwd_ids(self, product_ids):
+        return {product_id: endpoints.vwd_id(info) for product_id, info in self.products_info(product_ids).items()}
 
-        if timeType != 1 and timeType != 3:
-            raise Exception('Invalid time type')
+    def vwd_series(self, series, period, resolution=None):
+        price_payload = endpoints.price_payload(series, period, self.client_token, resolution)
+        return self.__request(endpoints.PRICE_DATA_URL, None, price_payload,
+                              error_message='Could not get real time price')['series']
 
-        place_check_order_response = self.__request(DeGiro.__PLACE_ORDER_URL + ';jsessionid=' + self.session_id, None,
-                                                    place_buy_order_payload, place_buy_order_params,
-                                                    request_type=DeGiro.__POST_REQUEST,
-                                                    error_message='Could not place order')
+    def real_time_price(self, product_id, interval):
+        vw_id = self.vwd_id(product_id)
+        return self.vwd_series(['issueid:' + vw_id, 'price:issueid:' + vw_id], interval)
+
+    def price_history(self, product_ids, intervals=Interval.Type.One_Day, resolution=None, kind='price',
+                      as_frame=True, batch_size=50):
+        single_product = not isinstance(product_ids, (list, tuple, set))
+        single_interval = not isinstance(intervals, list)
+        product_ids = [str(product_ids)] if single_product else [str(p) for p in product_ids]
+        intervals = [intervals] if single_interval else intervals
+
+        # one request per interval and batch of products, each product contributes one series
+        vwd_ids = self.vwd_ids(product_ids)
+        series_ids = {kind + ':issueid:' + vwd_id: product_id for product_id, vwd_id in vwd_ids.items()}
+        series = list(series_ids)
+        data = {}
+        for interval in intervals:
+            for start in range(0, len(series), batch_size):
+                for item in self.vwd_series(series[start:start + batch_size], period(interval), resolution):
+                    product_id = series_ids.get(item.get('id'))
+                    if product_id is not None and 'times' in item:
+                        data[(product_id, interval)] = decode_series(item, as_frame)
+
+        if single_product and single_interval:
+            return data.get((product_ids[0], intervals[0]))
+        return data
 
-        self.confirmation_id = place_check_order_response['data']['confirmationId']
+    def validate_orders(self, orders):
+        return self.order_validator.validate_batch(orders, self.__order_cash())
+
+    def check_order(self, order):
+        self.order_validator.check(order, cash=self.__order_cash())
+        place_check_order_response = self.__request(
+            endpoints.session_url(endpoints.PLACE_ORDER_URL, self.session_id), None,
+            order.payload(), self.__account_payload(),
+            request_type=DeGiro.__POST_REQUEST,
+            error_message='Could not place order')
+        return place_check_order_response['data']['confirmationId']
+
+    def confirm_order(self, order, confirmation_id):
+        confirm_order_response = self.__request(
+            endpoints.session_url(endpoints.ORDER_URL + confirmation_id, self.session_id), None,
+            order.payload(), self.__account_payload(),
+            request_type=DeGiro.__POST_REQUEST,
+            error_message='Could not confirm order')
+        data = confirm_order_response.get('data') if isinstance(confirm_order_response, dict) else None
+        return data.get('orderId') if isinstance(data, dict) else None
+
+    def place_order(self, order):
+        # check and confirm one order, the result is returned instead of being stored on the instance
+        result = OrderResult(order)
+        try:
+            result.confirmation_id = self.check_order(order)
+            result.order_id = self.confirm_order(order, result.confirmation_id)
+        except Exception as error:
+            result.error = error
+        return result
+
+    def place_orders(self, orders, max_in_flight=8):
+        # the batch is validated as a whole first (the buys share the cash), the orders that pass are checked and
+        # confirmed on their own worker, at most max_in_flight orders are on the wire
+        orders = list(orders)
+        valid = []
+        results = {}
+        for n, (order, errors) in enumerate(zip(orders, self.validate_orders(orders))):
+            if errors:
+                results[n] = OrderResult(order, error=OrderValidationError(errors))
+            else:
+                valid.append(n)
+        for n, result in zip(valid, fetch_ordered(self.place_order, [orders[n] for n in valid], max_in_flight)):
+            results[n] = result
+        if any(results[n].ok and orders[n].buysell == "BUY" for n in valid):
+            # the buys spent cash, the next orders fetch the cash funds again
+            self.__cash = None
+        return [results[n] for n in range(len(orders))]
 
-        self.__request(DeGiro.__ORDER_URL + self.confirmation_id + ';jsessionid=' + self.session_id, None,
-                       place_buy_order_payload, place_buy_order_params,
-                       request_type=DeGiro.__POST_REQUEST,
-                       error_message='Could not confirm order')
+    def buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        order = OrderRequest.buy(orderType, productId, timeType, size, limit, stop_loss)
+        self.confirmation_id = self.check_order(order)
+        self.confirm_order(order, self.confirmation_id)
+        self.__cash = None
+        return self.confirmation_id
 
     def sellorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
-        place_sell_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        place_sell_order_payload = {
-            'buySell': "SELL",
-            'orderType': orderType,
-            'productId': productId,
-            'timeType': timeType,
-            'size': size,
-            'price': limit,
-            'stopPrice': stop_loss,
-        }
-        if orderType != Order.Type.STOPLIMIT and orderType != Order.Type.MARKET \
-                and orderType != Order.Type.LIMIT and orderType != Order.Type.STOPLOSS:
-            raise Exception('Invalid order type')
-
-        if timeType != 1 and timeType != 3:
-            raise Exception('Invalid time type')
-
-        place_check_order_response = self.__request(DeGiro.__PLACE_ORDER_URL + ';jsessionid=' + self.session_id, None,
-                                                    place_sell_order_payload, place_sell_order_params,
-                                                    request_type=DeGiro.__POST_REQUEST,
-                                                    error_message='Could not place order')
-
-        self.confirmation_id = place_check_order_response['data']['confirmationId']
-
-        self.__request(DeGiro.__ORDER_URL + self.confirmation_id + ';jsessionid=' + self.session_id, None,
-                       place_sell_order_payload, place_sell_order_params,
-                       request_type=DeGiro.__POST_REQUEST,
-                       error_message='Could not confirm order')
+        order = OrderRequest.sell(orderType, productId, timeType, size, limit, stop_loss)
+        self.confirmation_id = self.check_order(order)
+        self.confirm_order(order, self.confirmation_id)
+        return self.confirmation_id
+
+    def __stock_page(self, indexId, stockCountryId, offset, limit):
+        stock_list_params = endpoints.stock_list_payload(self.client_info.account_id, self.session_id, indexId,
+                                                         stockCountryId, offset, limit)
+        page = self.__request(endpoints.GET_STOCKS_URL, None, stock_list_params,
+                              error_message='Could not get stock list')
+        if self.catalog is not None:
+            self.catalog.add(page.get('products') or [])
+        return page
 
     def get_stock_list(self, indexId, stockCountryId):
-        stock_list_params = {
-            'indexId': indexId,
-            'stockCountryId': stockCountryId,
-            'offset': 0,
-            'limit': None,
-            'requireTotal': "true",
-            'sortColumns': "name",
-            'sortTypes': "asc",
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return \
-            self.__request(DeGiro.__GET_STOCKS_URL, None, stock_list_params, error_message='Could not get stock list')[
-                'products']
-
-    def transactions_csv(self, from_date, to_date):
-        transactions_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-            'country': 'ES',
-            'lang': 'es',
-            'fromDate': self.validate(from_date),
-            'toDate': self.validate(to_date)
-        }
-        df = self.__request(DeGiro.__TRANSACTIONS_CSV_URL, None, transactions_payload, csv=True,
+        return self.__stock_page(indexId, stockCountryId, 0, None)['products']
+
+    def iter_stock_list(self, indexId, stockCountryId, page_size=500, prefetch=2):
+        return self.__paginate(lambda offset: self.__stock_page(indexId, stockCountryId, offset, page_size),
+                               page_size, prefetch)
+
+    def transactions_csv(self, from_date, to_date, country='ES', lang='es', decimal=None, engine=None, dtype=None):
+        transactions_payload = endpoints.report_payload(self.client_info.account_id, self.session_id, from_date,
+                                                        to_date, country, lang)
+        decimal = decimal or report_decimal(lang)
+        return self.__request(endpoints.TRANSACTIONS_CSV_URL, None, transactions_payload,
+                              csv=lambda stream: read_report(stream, decimal, engine, dtype),
                               error_message='Could not get transactions.')
-        df.insert(loc=0, column='Date', value=pd.to_datetime(df.pop('Fecha') + df.pop('Hora'), format='%d-%m-%Y%H:%M'))
-        return df
-
-    def account_overview_csv(self, from_date, to_date):
-        transactions_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-            'country': 'ES',
-            'lang': 'es',
-            'fromDate': self.validate(from_date),
-            'toDate': self.validate(to_date)
-        }
-        df = self.__request(DeGiro.__ACCOUNT_CSV_URL, None, transactions_payload, csv=True,
+
+    def account_overview_csv(self, from_date, to_date, country='ES', lang='es', decimal=None, engine=None,
+                             dtype=None):
+        transactions_payload = endpoints.report_payload(self.client_info.account_id, self.session_id, from_date,
+                                                        to_date, country, lang)
+        decimal = decimal or report_decimal(lang)
+        return self.__request(endpoints.ACCOUNT_CSV_URL, None, transactions_payload,
+                              csv=lambda stream: read_report(stream, decimal, engine, dtype),
                               error_message='Could not get account overview.')
-        df.insert(loc=0, column='Date', value=pd.to_datetime(df.pop('Fecha') + df.pop('Hora'), format='%d-%m-%Y%H:%M'))
-        return df
 
     def validate(self, strordate):
-        if isinstance(strordate, datetime.datetime):
-            strordate = strordate.strftime('%d/%m/%Y')
-        else:
-            try:
-                strordate = datetime.datetime.strptime(strordate, '%d/%m/%Y').strftime('%d/%m/%Y')
-            except ValueError:
-                raise ValueError("Incorrect data format, should be DD-MM-YYYY")
-        return strordate
+        return endpoints.validate_date(strordate)
 
     def future_dividends(self):
-        dividends_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__DIVIDENDS_URL + str(self.client_info.account_id), None, dividends_payload,
+        return self.__request(endpoints.DIVIDENDS_URL + str(self.client_info.account_id), None,
+                              self.__account_payload(),
                               error_message='Could not get future dividends.')['data']
 
-    def products_info(self, product_ids):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__PRODUCT_INFO_URL, None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=json.dumps([str(p) for p in product_ids]),
-                              request_type=DeGiro.__POST_REQUEST,
-                              error_message='Could not get product info.')['data']
+    def products_info(self, product_ids, use_catalog=True):
+        product_info_payload = self.__account_payload()
+        product_ids = [str(p) for p in product_ids]
+        data, missing = self.product_cache.get_many(dict.fromkeys(product_ids))
+        if missing and use_catalog and self.catalog is not None:
+            missing = self.__from_catalog(missing, data)
+        # the endpoint accepts a list of ids, split large lookups into chunks and merge them in the original order
+        for start in range(0, len(missing), self.products_info_chunk_size):
+            chunk = missing[start:start + self.products_info_chunk_size]
+            fetched = self.__request(endpoints.PRODUCT_INFO_URL, None, product_info_payload,
+                                     headers={'content-type': 'application/json'},
+                                     data=json.dumps(chunk),
+                                     request_type=DeGiro.__POST_REQUEST,
+                                     error_message='Could not get product info.', idempotent=True)['data']
+            self.product_cache.put_many(fetched)
+            if self.catalog is not None:
+                self.catalog.add(fetched.values())
+            data.update(fetched)
+        return {p: data[p] for p in product_ids if p in data}
+
+    def __from_catalog(self, missing, data):
+        # after a restart the products come from the catalog, only the ones with an outdated close price are fetched
+        stored = self.catalog.get_many(missing)
+        for product_id in self.catalog.stale(product_ids=list(stored)):
+            del stored[product_id]
+        self.product_cache.put_many(stored)
+        data.update(stored)
+        return [p for p in missing if p not in stored]
 
     def company_ratios(self, product_isin):
         if isinstance(product_isin, int):
             product_isin = str(product_isin)
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__COMPANY_RATIOS_URL + product_isin,
+        product_info_payload = self.__account_payload()
+        return self.__request(endpoints.COMPANY_RATIOS_URL + product_isin,
                               None, product_info_payload,
                               headers={'content-type': 'application/json'},
                               data=None,
@@ -449,11 +669,27 @@ class DeGiro:
                               error_message='Could not get company ratios.')['data']
 
     def company_profile(self, product_isin):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__COMPANY_PROFILE + product_isin,
+        product_info_payload = self.__account_payload()
+        return self.__request(endpoints.COMPANY_PROFILE_URL + product_isin,
                               None, product_info_payload,
                               headers={'content-type': 'application/json'},
-                              error_message='Could not get company profile.')['data']
\ No newline at end of file
+                              error_message='Could not get company profile.')['data']
+
+    def bulk(self, method, keys, max_workers=8):
+        return fetch_all(method, keys, max_workers)
+
+    def bulk_company_ratios(self, product_isins, max_workers=8):
+        return fetch_all(self.company_ratios, product_isins, max_workers)
+
+    def bulk_company_profile(self, product_isins, max_workers=8):
+        return fetch_all(self.company_profile, product_isins, max_workers)
+
+    def bulk_real_time_price(self, product_ids, interval, max_workers=8):
+        product_ids = list(product_ids)
+        # resolve the vwdIds of all products with batched product info requests first, after a transient failure
+        # every product resolves its own vwdId and records its error in its BulkResult
+        try:
+            self.products_info(product_ids)
+        except (RateLimitError, ServerError, requests.ConnectionError, requests.Timeout):
+            pass
+        return fetch_all(lambda product_id: self.real_time_price(product_id, interval), product_ids, max_workers)
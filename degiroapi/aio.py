@@ -0,0 +1,478 @@
+import asyncio
+import json
+import time
+from io import StringIO, BytesIO
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    raise ImportError('AsyncDeGiro requires aiohttp, install it with: pip install aiohttp')
+
+from degiroapi import DeGiro
+from degiroapi import endpoints
+from degiroapi.client_info import ClientInfo
+from degiroapi.datatypes import Data
+from degiroapi.cache import ProductCache
+from degiroapi.utils import date_windows
+from degiroapi.orderbatch import OrderRequest, OrderResult
+from degiroapi.validation import OrderValidator, OrderValidationError
+from degiroapi.exceptions import LoginError, RateLimitError, ServerError, request_error
+from degiroapi.reports import read_report, report_decimal
+from degiroapi.decoding import decode_portfolio, decode_cashfunds, product_ids, positions, cash_balances
+from degiroapi.instrumentation import RequestEvent, endpoint
+
+
+class AsyncDeGiro:
+    __GET_REQUEST = 0
+    __POST_REQUEST = 1
+    __DELETE_REQUEST = 2
+    __METHODS = {__GET_REQUEST: 'GET', __POST_REQUEST: 'POST', __DELETE_REQUEST: 'DELETE'}
+
+    client_token = any
+    session_id = any
+    client_info = any
+
+    def __init__(self, max_concurrency=100, limit_per_host=0, timeout=30, products_info_chunk_size=100,
+                 product_cache_size=10000, product_cache_ttl=3600, hooks=None, retries=3, backoff_factor=0.3,
+                 trader_url=None, charting_url=None, catalog=None):
+        self.__hosts = endpoints.hosts(trader_url, charting_url)
+        self.hooks = list(hooks) if hooks else []
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = 30
+        self.products_info_chunk_size = products_info_chunk_size
+        self.product_cache = ProductCache(product_cache_size, product_cache_ttl)
+        self.order_validator = OrderValidator(self.product_cache)
+        self.catalog = catalog
+        # the cash funds of the last cash funds response, the orders are validated against them
+        self.__cash = None
+        self.__credentials = None
+        self.__failed_renewal = None
+        self.__session = None
+        self.__semaphore = None
+        self.__login_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def __get_session(self):
+        # the session has to be created inside the running event loop
+        if self.__session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host)
+            self.__session = aiohttp.ClientSession(connector=connector,
+                                                   timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.__login_lock = asyncio.Lock()
+        return self.__session
+
+    async def login(self, username, password, totp=None):
+        login_payload = endpoints.login_payload(username, password, totp)
+        login_response = await self.__request(endpoints.LOGIN_TOTP_URL if totp is not None else endpoints.LOGIN_URL,
+                                              None, login_payload, request_type=AsyncDeGiro.__POST_REQUEST,
+                                              error_message='Could not login.')
+
+        self.session_id = login_response['sessionId']
+        client_info_payload = {'sessionId': self.session_id}
+        cookie = {
+            'JSESSIONID': self.session_id
+        }
+        client_info_response, client_token_response = await asyncio.gather(
+            self.__request(endpoints.CLIENT_INFO_URL, None, client_info_payload,
+                           error_message='Could not get client info.'),
+            self.__request(endpoints.CONFIG_URL, cookie=cookie, request_type=AsyncDeGiro.__GET_REQUEST,
+                           error_message='Could not get client config.'))
+        self.client_info = ClientInfo(client_info_response['data'])
+        self.client_token = client_token_response['data']['clientId']
+
+        # a one-time password can not be reused, only plain credentials allow a transparent re-login
+        self.__credentials = (username, password) if totp is None else None
+        return client_info_response
+
+    async def logout(self):
+        await self.__request(endpoints.session_url(endpoints.LOGOUT_URL, self.session_id), None,
+                             self.__account_payload(), error_message='Could not log out')
+        self.__credentials = None
+
+    def __account_payload(self, **fields):
+        return endpoints.account_payload(self.client_info.account_id, self.session_id, **fields)
+
+    @staticmethod
+    def __params(payload):
+        # aiohttp only accepts str/int/float query values, encode them the way requests does
+        if payload is None:
+            return None
+        params = []
+        for key, value in payload.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                if v is None:
+                    continue
+                params.append((str(key), str(v) if isinstance(v, bool) else v))
+        return params
+
+    @staticmethod
+    def __kwargs(cookie, payload, headers, data, post_params, request_type):
+        if request_type == AsyncDeGiro.__DELETE_REQUEST:
+            return {'method': 'DELETE', 'json': payload}
+        elif request_type == AsyncDeGiro.__GET_REQUEST and cookie:
+            return {'method': 'GET', 'cookies': cookie}
+        elif request_type == AsyncDeGiro.__GET_REQUEST:
+            return {'method': 'GET', 'params': AsyncDeGiro.__params(payload)}
+        elif request_type == AsyncDeGiro.__POST_REQUEST and headers and data:
+            return {'method': 'POST', 'headers': headers, 'params': AsyncDeGiro.__params(payload), 'data': data}
+        elif request_type == AsyncDeGiro.__POST_REQUEST and post_params:
+            return {'method': 'POST', 'params': AsyncDeGiro.__params(post_params), 'json': payload}
+        elif request_type == AsyncDeGiro.__POST_REQUEST:
+            return {'method': 'POST', 'json': payload}
+        else:
+            raise Exception(f'Unknown request type: {request_type}')
+
+    async def __renew_session(self, expired_session_id):
+        # single flight: the tasks that saw the same expired session wait for one login instead of each logging in
+        failed = self.__failed_renewal
+        async with self.__login_lock:
+            if self.session_id != expired_session_id:
+                return
+            if self.__failed_renewal is not failed and self.__failed_renewal[0] == expired_session_id:
+                raise self.__failed_renewal[1]
+            if self.__credentials is None:
+                return
+            try:
+                await self.login(*self.__credentials)
+            except Exception as error:
+                self.__failed_renewal = (expired_session_id, error)
+                if isinstance(error, LoginError):
+                    # the credentials are rejected, retrying them can lock the account
+                    self.__credentials = None
+                raise
+
+    async def __request(self, url, cookie=None, payload=None, headers=None, data=None, post_params=None,
+                        request_type=__GET_REQUEST, csv=False, error_message='An error occurred.', idempotent=None):
+        hooks = self.hooks
+        if not hooks:
+            return await self.__perform(url, cookie, payload, headers, data, post_params, request_type, csv,
+                                        error_message, idempotent, None)
+        event = RequestEvent(endpoint(url), AsyncDeGiro.__METHODS.get(request_type))
+        start = time.perf_counter()
+        try:
+            return await self.__perform(url, cookie, payload, headers, data, post_params, request_type, csv,
+                                        error_message, idempotent, event)
+        except Exception as error:
+            event.error = type(error).__name__
+            raise
+        finally:
+            event.duration = time.perf_counter() - start
+            for hook in hooks:
+                hook(event)
+
+    async def __perform(self, url, cookie, payload, headers, data, post_params, request_type, csv, error_message,
+                        idempotent, event):
+        session = self.__get_session()
+        # the requests of login() itself never renew the session, the renewing task holds the login lock
+        renewable = url not in endpoints.SESSION_URLS
+        if idempotent is None:
+            idempotent = request_type == AsyncDeGiro.__GET_REQUEST
+        renewed = False
+        attempt = 0
+        while True:
+            kwargs = AsyncDeGiro.__kwargs(cookie, payload, headers, data, post_params, request_type)
+            async with self.__semaphore:
+                async with session.request(url=endpoints.rewrite(url, self.__hosts), **kwargs) as response:
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    body = await response.read()
+            if event is not None:
+                event.status_code = status
+                event.request_bytes += len(json.dumps(kwargs['json'])) if kwargs.get('json') is not None else 0
+
+            # an expired session is renewed once with the known credentials
+            if status == 401 and not renewed and renewable and self.__credentials is not None \
+                    and isinstance(self.session_id, str):
+                old = self.session_id
+                await self.__renew_session(old)
+                url, cookie, payload, post_params = (endpoints.replace_session(v, old, self.session_id)
+                                                     for v in (url, cookie, payload, post_params))
+                renewed = True
+                if event is not None:
+                    event.retries += 1
+                continue
+
+            if (status == 429 or status >= 500) and idempotent and attempt < self.retries:
+                await asyncio.sleep(endpoints.retry_delay(retry_after, attempt, self.backoff_factor,
+                                                          self.max_backoff))
+                attempt += 1
+                if event is not None:
+                    event.retries += 1
+                continue
+            break
+
+        if event is None:
+            return self.__decode(status, body, url, csv, error_message)
+        event.response_bytes = len(body)
+        decode_start = time.perf_counter()
+        try:
+            return self.__decode(status, body, url, csv, error_message)
+        finally:
+            event.decode_time = time.perf_counter() - decode_start
+
+    @staticmethod
+    def __decode(status, body, url, csv, error_message):
+        if callable(csv) and (status == 200 or status == 201):
+            return csv(BytesIO(body))
+        text = body.decode('utf-8', errors='replace')
+        if status == 200 or status == 201:
+            if csv == True:
+                import pandas as pd
+                try:
+                    return pd.read_csv(StringIO(text))
+                except:
+                    return "No data"
+            try:
+                return json.loads(text)
+            except ValueError:
+                import pandas as pd
+                return pd.read_csv(StringIO(text))
+            except:
+                return "No data"
+        else:
+            raise request_error(f'{error_message} Response: {text}', status, url, text, url in endpoints.LOGIN_URLS)
+
+    async def search_products(self, search_text, limit=1, offset=0):
+        product_search_payload = endpoints.search_payload(self.client_info.account_id, self.session_id, search_text,
+                                                          offset, limit)
+        return (await self.__request(endpoints.PRODUCT_SEARCH_URL, None, product_search_payload,
+                                     error_message='Could not get products.'))['products']
+
+    async def product_info(self, product_id):
+        return (await self.products_info([product_id]))[str(product_id)]
+
+    async def products_info(self, product_ids, use_catalog=True):
+        product_info_payload = self.__account_payload()
+        product_ids = [str(p) for p in product_ids]
+        data, missing = self.product_cache.get_many(dict.fromkeys(product_ids))
+        if missing and use_catalog and self.catalog is not None:
+            missing = self.__from_catalog(missing, data)
+        chunks = [missing[start:start + self.products_info_chunk_size]
+                  for start in range(0, len(missing), self.products_info_chunk_size)]
+        responses = await asyncio.gather(*[
+            self.__request(endpoints.PRODUCT_INFO_URL, None, product_info_payload,
+                           headers={'content-type': 'application/json'},
+                           data=json.dumps(chunk),
+                           request_type=AsyncDeGiro.__POST_REQUEST,
+                           error_message='Could not get product info.', idempotent=True) for chunk in chunks])
+        for response in responses:
+            self.product_cache.put_many(response['data'])
+            if self.catalog is not None:
+                self.catalog.add(response['data'].values())
+            data.update(response['data'])
+        return {p: data[p] for p in product_ids if p in data}
+
+    def __from_catalog(self, missing, data):
+        # after a restart the products come from the catalog, only the ones with an outdated close price are fetched
+        stored = self.catalog.get_many(missing)
+        for product_id in self.catalog.stale(product_ids=list(stored)):
+            del stored[product_id]
+        self.product_cache.put_many(stored)
+        data.update(stored)
+        return [p for p in missing if p not in stored]
+
+    async def __windowed(self, fetch, from_date, to_date, days):
+        # the windows are fetched concurrently (bounded by max_concurrency) and concatenated in order
+        windows = date_windows(endpoints.to_datetime(from_date), endpoints.to_datetime(to_date), days)
+        pages = await asyncio.gather(*[fetch(start, end) for start, end in windows])
+        return [record for records in pages for record in records]
+
+    async def __transactions(self, from_date, to_date, group_transactions=False):
+        transactions_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date,
+                                                      to_date, group_transactions_by_order=group_transactions)
+        return (await self.__request(endpoints.TRANSACTIONS_URL, None, transactions_payload,
+                                     error_message='Could not get transactions.'))['data']
+
+    async def transactions(self, from_date, to_date, group_transactions=False, window_days=365):
+        return await self.__windowed(lambda start, end: self.__transactions(start, end, group_transactions),
+                                     from_date, to_date, window_days)
+
+    async def __cash_movements(self, from_date, to_date):
+        account_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date, to_date)
+        data = (await self.__request(endpoints.ACCOUNT_URL, None, account_payload,
+                                     error_message='Could not get account overview.'))['data']
+        return data.get('cashMovements', [])
+
+    async def account_overview(self, from_date, to_date, window_days=365):
+        return {'cashMovements': await self.__windowed(self.__cash_movements, from_date, to_date, window_days)}
+
+    async def __orders(self, from_date, to_date):
+        orders_payload = endpoints.date_payload(self.client_info.account_id, self.session_id, from_date, to_date)
+        return (await self.__request(endpoints.ORDERS_URL, None, orders_payload,
+                                     error_message='Could not get orders.'))['data']
+
+    async def orders(self, from_date, to_date, not_executed=None):
+        data = await self.__windowed(self.__orders, from_date, to_date, endpoints.ORDERS_WINDOW_DAYS)
+        if not_executed:
+            return [d for d in data if d['isActive']]
+        return data
+
+    async def delete_order(self, orderId):
+        return await self.__request(endpoints.session_url(endpoints.ORDER_URL + orderId, self.session_id), None,
+                                    self.__account_payload(),
+                                    request_type=AsyncDeGiro.__DELETE_REQUEST,
+                                    error_message='Could not delete order' + " " + orderId)
+
+    filtercashfunds = staticmethod(DeGiro.filtercashfunds)
+
+    async def filterportfolio(self, portfolio, filter_zero=None, as_records=False, as_frame=False):
+        columns = decode_portfolio(portfolio)
+        ids = product_ids(columns)
+        infos = await self.products_info(ids) if ids else {}
+        return positions(columns, infos, filter_zero, as_records, as_frame)
+
+    async def getdata(self, datatype, filter_zero=None, as_records=False, as_frame=False):
+        data_payload = {
+            datatype: 0
+        }
+        response = await self.__request(endpoints.data_url(self.client_info.account_id, self.session_id), None,
+                                        data_payload,
+                                        error_message='Could not get data')
+        if datatype == Data.Type.CASHFUNDS:
+            if isinstance(response, dict) and isinstance(response.get(Data.Type.CASHFUNDS), dict):
+                self.__cash = cash_balances(decode_cashfunds(response))
+            return self.filtercashfunds(response, as_frame)
+        elif datatype == Data.Type.PORTFOLIO:
+            return await self.filterportfolio(response, filter_zero, as_records, as_frame)
+        return response
+
+    async def real_time_price(self, product_id, interval):
+        vw_id = endpoints.vwd_id(await self.product_info(product_id))
+        price_payload = endpoints.price_payload(['issueid:' + vw_id, 'price:issueid:' + vw_id], interval,
+                                                self.client_token)
+        return (await self.__request(endpoints.PRICE_DATA_URL, None, price_payload,
+                                     error_message='Could not get real time price'))['series']
+
+    async def __order_cash(self):
+        # the cash the orders are validated against: order_validator.cash when set, else the cash funds of the last
+        # response, fetched when none is known
+        if self.order_validator.cash is not None:
+            return self.order_validator.cash
+        if self.__cash is None:
+            try:
+                await self.getdata(Data.Type.CASHFUNDS)
+            except (RateLimitError, ServerError, aiohttp.ClientError, asyncio.TimeoutError):
+                # without the cash the orders are still checked, only not against the cash
+                pass
+        return self.__cash
+
+    async def validate_orders(self, orders):
+        return self.order_validator.validate_batch(orders, await self.__order_cash())
+
+    async def check_order(self, order):
+        self.order_validator.check(order, cash=await self.__order_cash())
+        place_check_order_response = await self.__request(
+            endpoints.session_url(endpoints.PLACE_ORDER_URL, self.session_id), None,
+            order.payload(), self.__account_payload(),
+            request_type=AsyncDeGiro.__POST_REQUEST,
+            error_message='Could not place order')
+        return place_check_order_response['data']['confirmationId']
+
+    async def confirm_order(self, order, confirmation_id):
+        confirm_order_response = await self.__request(
+            endpoints.session_url(endpoints.ORDER_URL + confirmation_id, self.session_id), None,
+            order.payload(), self.__account_payload(),
+            request_type=AsyncDeGiro.__POST_REQUEST,
+            error_message='Could not confirm order')
+        data = confirm_order_response.get('data') if isinstance(confirm_order_response, dict) else None
+        return data.get('orderId') if isinstance(data, dict) else None
+
+    async def place_order(self, order):
+        result = OrderResult(order)
+        try:
+            result.confirmation_id = await self.check_order(order)
+            result.order_id = await self.confirm_order(order, result.confirmation_id)
+        except Exception as error:
+            result.error = error
+        return result
+
+    async def place_orders(self, orders, max_in_flight=8):
+        # the batch is validated as a whole first (the buys share the cash), at most max_in_flight orders are on
+        # the wire
+        orders = list(orders)
+        in_flight = asyncio.Semaphore(max_in_flight)
+
+        async def place(order, errors):
+            if errors:
+                return OrderResult(order, error=OrderValidationError(errors))
+            async with in_flight:
+                return await self.place_order(order)
+
+        results = await asyncio.gather(*[place(order, errors) for order, errors in
+                                         zip(orders, await self.validate_orders(orders))])
+        if any(result.ok and result.order.buysell == "BUY" for result in results):
+            # the buys spent cash, the next orders fetch the cash funds again
+            self.__cash = None
+        return list(results)
+
+    async def buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        order = OrderRequest.buy(orderType, productId, timeType, size, limit, stop_loss)
+        confirmation_id = await self.check_order(order)
+        await self.confirm_order(order, confirmation_id)
+        self.__cash = None
+        return confirmation_id
+
+    async def sellorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        order = OrderRequest.sell(orderType, productId, timeType, size, limit, stop_loss)
+        confirmation_id = await self.check_order(order)
+        await self.confirm_order(order, confirmation_id)
+        return confirmation_id
+
+    async def get_stock_list(self, indexId, stockCountryId):
+        stock_list_params = endpoints.stock_list_payload(self.client_info.account_id, self.session_id, indexId,
+                                                         stockCountryId, 0, None)
+        return (await self.__request(endpoints.GET_STOCKS_URL, None, stock_list_params,
+                                     error_message='Could not get stock list'))['products']
+
+    async def transactions_csv(self, from_date, to_date, country='ES', lang='es', decimal=None, engine=None,
+                               dtype=None):
+        transactions_payload = endpoints.report_payload(self.client_info.account_id, self.session_id, from_date,
+                                                        to_date, country, lang)
+        decimal = decimal or report_decimal(lang)
+        return await self.__request(endpoints.TRANSACTIONS_CSV_URL, None, transactions_payload,
+                                    csv=lambda stream: read_report(stream, decimal, engine, dtype),
+                                    error_message='Could not get transactions.')
+
+    async def account_overview_csv(self, from_date, to_date, country='ES', lang='es', decimal=None, engine=None,
+                                   dtype=None):
+        transactions_payload = endpoints.report_payload(self.client_info.account_id, self.session_id, from_date,
+                                                        to_date, country, lang)
+        decimal = decimal or report_decimal(lang)
+        return await self.__request(endpoints.ACCOUNT_CSV_URL, None, transactions_payload,
+                                    csv=lambda stream: read_report(stream, decimal, engine, dtype),
+                                    error_message='Could not get account overview.')
+
+    validate = staticmethod(endpoints.validate_date)
+
+    async def future_dividends(self):
+        return (await self.__request(endpoints.DIVIDENDS_URL + str(self.client_info.account_id), None,
+                                     self.__account_payload(),
+                                     error_message='Could not get future dividends.'))['data']
+
+    async def company_ratios(self, product_isin):
+        if isinstance(product_isin, int):
+            product_isin = str(product_isin)
+        return (await self.__request(endpoints.COMPANY_RATIOS_URL + product_isin,
+                                     None, self.__account_payload(),
+                                     error_message='Could not get company ratios.'))['data']
+
+    async def company_profile(self, product_isin):
+        return (await self.__request(endpoints.COMPANY_PROFILE_URL + product_isin,
+                                     None, self.__account_payload(),
+                                     error_message='Could not get company profile.'))['data']
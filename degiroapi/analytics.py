@@ -0,0 +1,278 @@
+import threading
+
+import numpy as np
+
+from degiroapi.datatypes import Data
+from degiroapi.decoding import PORTFOLIO_FIELDS, decode_portfolio, product_ids
+
+
+def _currency(position_id, position_type, info):
+    if position_type == 'CASH':
+        # the cash rows are named after their currency, e.g. EUR or FLATEX_EUR
+        return str(position_id).rsplit('_', 1)[-1]
+    return info.get('currency')
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PortfolioAnalytics:
+    def __init__(self, degiro=None, tracker=None, fx=None, base_currency=None, account=None):
+        # fx maps a currency to its rate in the base currency, the missing rates are implied by the snapshot
+        self.__degiro = degiro
+        self.__tracker = tracker
+        self.__fx = dict(fx or {})
+        self.base_currency = base_currency
+        self.account = account
+        self.__lock = threading.RLock()
+        self.__load([], [], [], [], [], [], [], [])
+        if tracker is not None:
+            tracker.subscribe(self.__on_update)
+            self.load(tracker.columns(Data.Type.PORTFOLIO, PORTFOLIO_FIELDS))
+
+    @classmethod
+    def from_degiro(cls, degiro, fx=None, base_currency=None):
+        analytics = cls(degiro, fx=fx, base_currency=base_currency, account=degiro.client_info.account_id)
+        analytics.load(decode_portfolio(degiro.update({Data.Type.PORTFOLIO: 0})))
+        return analytics
+
+    @classmethod
+    def from_portfolio(cls, portfolio, infos, fx=None, base_currency=None, account=None):
+        analytics = cls(fx=fx, base_currency=base_currency, account=account)
+        analytics.load(decode_portfolio(portfolio), infos)
+        return analytics
+
+    @classmethod
+    def concat(cls, analytics, fx=None, base_currency=None):
+        # one view over several accounts, the accounts have to share the base currency
+        combined = cls(fx=fx, base_currency=base_currency)
+        parts = [a.__snapshot() for a in analytics]
+        combined.__load(*[sum((list(part[n]) for part in parts), []) for n in range(8)])
+        return combined
+
+    def __snapshot(self):
+        with self.__lock:
+            accounts = self.__accounts if self.__accounts is not None else [self.account] * len(self.__ids)
+            return (self.__ids, accounts, self.__types, self.__currencies, self.__size, self.__price,
+                    self.__break_even, self.__value)
+
+    def __infos(self, columns, infos):
+        if infos is None:
+            ids = product_ids(columns)
+            infos = self.__degiro.products_info(ids) if ids and self.__degiro is not None else {}
+        return infos
+
+    def load(self, columns, infos=None):
+        # columns are the decoded portfolio rows (decode_portfolio or UpdateTracker.columns)
+        infos = self.__infos(columns, infos)
+        ids = [str(i) for i in columns['id']]
+        types = []
+        currencies = []
+        for position_id, position_type in zip(ids, columns['positionType']):
+            info = infos.get(position_id, {})
+            types.append('CASH' if position_type == 'CASH' else info.get('productType', position_type))
+            currencies.append(_currency(position_id, position_type, info))
+        self.__load(ids, [self.account] * len(ids), types, currencies, columns['size'], columns['price'],
+                    columns['breakEvenPrice'], columns['value'])
+
+    def __load(self, ids, accounts, types, currencies, size, price, break_even, value):
+        with self.__lock:
+            self.__ids = np.array(ids, dtype=object)
+            self.__index = {(account, position_id): n for n, (account, position_id) in enumerate(zip(accounts, ids))}
+            self.__accounts = list(accounts) if any(a is not None for a in accounts) else None
+            self.__types = np.array(types, dtype=object)
+            self.__currencies = np.array(currencies, dtype=object)
+            self.__size = np.array([_number(v) for v in size], dtype=np.float64)
+            self.__price = np.array([_number(v) for v in price], dtype=np.float64)
+            self.__break_even = np.array([_number(v) for v in break_even], dtype=np.float64)
+            self.__value = np.array([_number(v) for v in value], dtype=np.float64)
+            self.__currency_codes, self.__currency_index = np.unique(self.__currencies.astype(str),
+                                                                     return_inverse=True)
+            self.__type_codes, self.__type_index = np.unique(self.__types.astype(str), return_inverse=True)
+            self.__reprice()
+
+    def __reprice(self):
+        rates = self.fx_rates()
+        self.__rates = np.array([rates.get(c, np.nan) for c in self.__currency_codes], dtype=np.float64)
+        self.__compute(slice(None))
+        self.__total = float(np.nansum(self.__market_value))
+
+    def __compute(self, rows):
+        fx = self.__rates[self.__currency_index[rows]] if len(self.__rates) else np.empty(0)
+        size = self.__size[rows]
+        if isinstance(rows, slice):
+            self.__market_value = size * self.__price[rows] * fx
+            self.__pnl = size * (self.__price[rows] - self.__break_even[rows]) * fx
+            self.__pnl[self.__types[rows] == 'CASH'] = 0.0
+        else:
+            self.__market_value[rows] = size * self.__price[rows] * fx
+            pnl = size * (self.__price[rows] - self.__break_even[rows]) * fx
+            pnl[self.__types[rows] == 'CASH'] = 0.0
+            self.__pnl[rows] = pnl
+
+    def fx_rates(self):
+        # the rate of a currency is implied by value / (size * price) of its positions, value is in the base currency
+        with self.__lock:
+            local = self.__size * self.__price
+            implied = {}
+            known = np.abs(local) > 0
+            for code, currency in enumerate(self.__currency_codes):
+                rows = known & (self.__currency_index == code)
+                if rows.any():
+                    implied[currency] = float(np.median(self.__value[rows] / local[rows]))
+            if self.base_currency is not None:
+                implied[self.base_currency] = 1.0
+            implied.update(self.__fx)
+            return implied
+
+    def set_fx(self, rates):
+        with self.__lock:
+            self.__fx.update(rates)
+            self.__reprice()
+
+    def update(self, rows, removed=(), infos=None, account=None):
+        # rows maps a position id to its changed fields, only the ticking positions are recomputed
+        with self.__lock:
+            account = account if account is not None else self.account
+            changed = []
+            new = {}
+            for position_id, fields in rows.items():
+                n = self.__index.get((account, str(position_id)))
+                if n is None:
+                    new[str(position_id)] = fields
+                    continue
+                for field, column in (('size', self.__size), ('price', self.__price),
+                                      ('breakEvenPrice', self.__break_even), ('value', self.__value)):
+                    if field in fields:
+                        column[n] = _number(fields[field])
+                changed.append(n)
+            for position_id in removed:
+                n = self.__index.get((account, str(position_id)))
+                if n is not None:
+                    self.__size[n] = 0.0
+                    changed.append(n)
+            if new:
+                self.__append(new, infos, account)
+            elif changed:
+                rows = np.array(changed)
+                before = float(np.nansum(self.__market_value[rows]))
+                self.__compute(rows)
+                self.__total += float(np.nansum(self.__market_value[rows])) - before
+
+    def __append(self, new, infos, account):
+        columns = {field: [fields.get(field) for fields in new.values()] for field in PORTFOLIO_FIELDS}
+        columns['id'] = list(new)
+        infos = self.__infos(columns, infos)
+        ids, accounts, types, currencies, size, price, break_even, value = (list(c) for c in self.__snapshot())
+        for position_id, fields in new.items():
+            position_type = fields.get('positionType')
+            info = infos.get(position_id, {})
+            ids.append(position_id)
+            accounts.append(account)
+            types.append('CASH' if position_type == 'CASH' else info.get('productType', position_type))
+            currencies.append(_currency(position_id, position_type, info))
+            size.append(fields.get('size'))
+            price.append(fields.get('price'))
+            break_even.append(fields.get('breakEvenPrice'))
+            value.append(fields.get('value'))
+        self.__load(ids, accounts, types, currencies, size, price, break_even, value)
+
+    def __on_update(self, datatype, changed, removed):
+        if datatype != Data.Type.PORTFOLIO:
+            return
+        rows = {}
+        for position_id in changed:
+            fields = self.__tracker.row(Data.Type.PORTFOLIO, position_id)
+            if fields is not None:
+                rows[position_id] = fields
+        self.update(rows, removed)
+
+    @property
+    def ids(self):
+        return self.__ids
+
+    @property
+    def total(self):
+        return self.__total
+
+    def market_value(self):
+        return self.__market_value.copy()
+
+    def unrealized_pnl(self):
+        return self.__pnl.copy()
+
+    def unrealized_pnl_pct(self):
+        with self.__lock:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(self.__break_even != 0, self.__price / self.__break_even - 1, np.nan)
+
+    def weights(self):
+        with self.__lock:
+            return self.__market_value / self.__total if self.__total else np.zeros(len(self.__ids))
+
+    def exposure(self, by='currency'):
+        # the market value in the base currency grouped by currency or product type, in one pass
+        with self.__lock:
+            if by == 'currency':
+                codes, index = self.__currency_codes, self.__currency_index
+            elif by == 'product_type':
+                codes, index = self.__type_codes, self.__type_index
+            else:
+                raise ValueError(f'Unknown exposure grouping: {by}')
+            sums = np.bincount(index, weights=np.nan_to_num(self.__market_value), minlength=len(codes))
+            return dict(zip(codes.tolist(), sums.tolist()))
+
+    def breaches(self, max_weight=None, max_exposure=None, by='currency'):
+        # the positions above max_weight and the groups above max_exposure, as shares of the total
+        result = {'positions': {}, 'exposure': {}}
+        if max_weight is not None:
+            weights = self.weights()
+            rows = np.flatnonzero(np.abs(weights) > max_weight)
+            result['positions'] = {self.__label(n): float(weights[n]) for n in rows}
+        if max_exposure is not None and self.__total:
+            result['exposure'] = {group: value / self.__total for group, value in self.exposure(by).items()
+                                  if abs(value / self.__total) > max_exposure}
+        return result
+
+    def rebalance(self, targets, total=None, whole_units=True):
+        # targets maps a position id to its target weight, the other positions are kept; returns the trades
+        with self.__lock:
+            total = self.__total if total is None else total
+            target = self.__market_value.copy()
+            rows = np.array([self.__index[self.__key(i)] for i in targets], dtype=np.int64)
+            target[rows] = np.array(list(targets.values()), dtype=np.float64) * total
+            delta_value = target - self.__market_value
+            with np.errstate(divide='ignore', invalid='ignore'):
+                delta_size = delta_value / (self.__price * self.__rates[self.__currency_index])
+            delta_size[~np.isfinite(delta_size)] = 0.0
+            if whole_units:
+                delta_size = np.trunc(delta_size)
+            trades = np.flatnonzero(delta_size != 0)
+            return {self.__label(n): {'size': float(delta_size[n]), 'value': float(delta_value[n])} for n in trades}
+
+    def __key(self, position):
+        # a position id, or an (account, position id) pair when several accounts are combined
+        return (position[0], str(position[1])) if isinstance(position, tuple) else (self.account, str(position))
+
+    def __label(self, n):
+        return (self.__accounts[n], self.__ids[n]) if self.__accounts is not None else self.__ids[n]
+
+    def to_frame(self):
+        import pandas as pd
+        with self.__lock:
+            return pd.DataFrame({
+                'id': self.__ids,
+                'account': self.__accounts if self.__accounts is not None else self.account,
+                'productType': self.__types,
+                'currency': self.__currencies,
+                'size': self.__size,
+                'price': self.__price,
+                'breakEvenPrice': self.__break_even,
+                'marketValue': self.__market_value,
+                'unrealizedPnl': self.__pnl,
+                'weight': self.weights(),
+            })
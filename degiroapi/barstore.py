@@ -0,0 +1,130 @@
+import os
+import threading
+
+import numpy as np
+
+from degiroapi.intervaltypes import Interval
+from degiroapi.series import COLUMNS, parse_duration
+
+
+class BarStore:
+    # periods from short to long, an update fetches the shortest period that covers the missing tail
+    __PERIODS = (
+        (np.timedelta64(1, 'D'), Interval.Type.One_Day),
+        (np.timedelta64(7, 'D'), Interval.Type.One_Week),
+        (np.timedelta64(28, 'D'), Interval.Type.One_Month),
+        (np.timedelta64(89, 'D'), Interval.Type.Three_Months),
+        (np.timedelta64(181, 'D'), Interval.Type.Six_Months),
+        (np.timedelta64(365, 'D'), Interval.Type.One_Year),
+        (np.timedelta64(3 * 365, 'D'), Interval.Type.Three_Years),
+        (np.timedelta64(5 * 365, 'D'), Interval.Type.Five_Years),
+    )
+
+    def __init__(self, directory, resolution='P1D', kind='ohlc'):
+        self.__directory = directory
+        self.__resolution = resolution
+        self.__kind = kind
+        self.__columns = COLUMNS[kind]
+        self.__dtype = np.dtype([('time', 'datetime64[ms]')] + [(c, np.float64) for c in self.__columns])
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    @property
+    def resolution(self):
+        return self.__resolution
+
+    @property
+    def kind(self):
+        return self.__kind
+
+    @property
+    def dtype(self):
+        return self.__dtype
+
+    def path(self, product_id):
+        return os.path.join(self.__directory, f'{product_id}.{self.__kind}.{self.__resolution}.bars')
+
+    def product_ids(self):
+        suffix = f'.{self.__kind}.{self.__resolution}.bars'
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.__directory) if name.endswith(suffix))
+
+    def __len_of(self, path):
+        return os.path.getsize(path) // self.__dtype.itemsize if os.path.exists(path) else 0
+
+    def __bars(self, product_id, mode='r'):
+        path = self.path(product_id)
+        count = self.__len_of(path)
+        if count == 0:
+            return np.empty(0, dtype=self.__dtype)
+        return np.memmap(path, dtype=self.__dtype, mode=mode, shape=(count,))
+
+    def last_time(self, product_id):
+        bars = self.__bars(product_id)
+        return bars['time'][-1] if len(bars) else None
+
+    def append(self, product_id, bars):
+        # bars newer than the stored tail are appended, a bar at the last stored time replaces it (unfinished bar)
+        bars = np.asarray(bars, dtype=self.__dtype)
+        with self.__lock:
+            stored = self.__bars(product_id, mode='r+')
+            if len(stored):
+                last = stored['time'][-1]
+                same = bars[bars['time'] == last]
+                if len(same):
+                    stored[-1] = same[-1]
+                    stored.flush()
+                bars = bars[bars['time'] > last]
+            del stored
+            if len(bars):
+                bars = np.sort(bars, order='time')
+                with open(self.path(product_id), 'ab') as f:
+                    f.write(bars.tobytes())
+        return len(bars)
+
+    def read(self, product_id, start=None, end=None):
+        # a memory-mapped view of the bars in [start, end], nothing is copied
+        bars = self.__bars(product_id)
+        times = bars['time']
+        lo = np.searchsorted(times, np.datetime64(start, 'ms')) if start is not None else 0
+        hi = np.searchsorted(times, np.datetime64(end, 'ms'), side='right') if end is not None else len(bars)
+        return bars[lo:hi]
+
+    def frame(self, product_id, start=None, end=None):
+        import pandas as pd
+        bars = self.read(product_id, start, end)
+        return pd.DataFrame({c: bars[c] for c in self.__columns}, index=pd.DatetimeIndex(bars['time'], name='time'))
+
+    def delete(self, product_id):
+        with self.__lock:
+            if os.path.exists(self.path(product_id)):
+                os.remove(self.path(product_id))
+
+    def period_for(self, product_id, now=None):
+        last = self.last_time(product_id)
+        if last is None:
+            return Interval.Type.Max
+        now = np.datetime64(now if now is not None else 'now', 'ms')
+        months = parse_duration(self.__resolution)[0]
+        missing = now - last + np.timedelta64(months * 31, 'D')
+        for span, interval in BarStore.__PERIODS:
+            if missing <= span:
+                return interval
+        return Interval.Type.Max
+
+    def update(self, degiro, product_ids, now=None):
+        # group the products by the period needed to cover their missing tail, one batched fetch per group
+        groups = {}
+        for product_id in product_ids:
+            groups.setdefault(self.period_for(product_id, now), []).append(str(product_id))
+        appended = {}
+        for interval, ids in groups.items():
+            histories = degiro.price_history(ids, [interval], resolution=self.__resolution, kind=self.__kind,
+                                             as_frame=False)
+            for product_id in ids:
+                bars = histories.get((product_id, interval))
+                appended[product_id] = self.append(product_id, bars) if bars is not None else 0
+        return appended
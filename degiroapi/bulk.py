@@ -0,0 +1,72 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class BulkResult:
+    __slots__ = ('key', 'value', 'error')
+
+    def __init__(self, key, value=None, error=None):
+        self.key = key
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f'BulkResult({self.key!r}, value={self.value!r})'
+        return f'BulkResult({self.key!r}, error={self.error!r})'
+
+
+def fetch_all(func, keys, max_workers=8):
+    # yields a BulkResult per key as soon as it completes, errors are collected instead of raised
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    try:
+        for key in keys:
+            futures[executor.submit(func, key)] = key
+        for future in as_completed(futures):
+            try:
+                yield BulkResult(futures[future], value=future.result())
+            except Exception as error:
+                yield BulkResult(futures[future], error=error)
+    finally:
+        # stop the pending requests when the caller stops consuming early
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def collect(results):
+    values = {}
+    errors = {}
+    for result in results:
+        if result.ok:
+            values[result.key] = result.value
+        else:
+            errors[result.key] = result.error
+    return values, errors
+
+
+def fetch_ordered(func, keys, max_workers=4):
+    # yields the results in the order of the keys with at most max_workers requests in flight, errors are raised
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    keys = iter(keys)
+    try:
+        for key in keys:
+            pending.append(executor.submit(func, key))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for key in keys:
+                pending.append(executor.submit(func, key))
+                break
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProductCache:
+    def __init__(self, maxsize=10000, ttl=3600):
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def maxsize(self):
+        return self.__maxsize
+
+    @property
+    def ttl(self):
+        return self.__ttl
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, product_id):
+        return self.get(product_id, count=False) is not None
+
+    def get(self, product_id, count=True):
+        product_id = str(product_id)
+        with self.__lock:
+            entry = self.__entries.get(product_id)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.__entries[product_id]
+                entry = None
+            if entry is None:
+                if count:
+                    self.__misses += 1
+                return None
+            self.__entries.move_to_end(product_id)
+            if count:
+                self.__hits += 1
+            return entry[1]
+
+    def get_many(self, product_ids):
+        found = {}
+        missing = []
+        for product_id in product_ids:
+            info = self.get(product_id)
+            if info is None:
+                missing.append(str(product_id))
+            else:
+                found[str(product_id)] = info
+        return found, missing
+
+    def put(self, product_id, info):
+        product_id = str(product_id)
+        with self.__lock:
+            self.__entries[product_id] = (time.monotonic() + self.__ttl, info)
+            self.__entries.move_to_end(product_id)
+            while len(self.__entries) > self.__maxsize:
+                self.__entries.popitem(last=False)
+
+    def put_many(self, infos):
+        for product_id, info in infos.items():
+            self.put(product_id, info)
+
+    def invalidate(self, product_id=None):
+        with self.__lock:
+            if product_id is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(str(product_id), None)
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__hits = 0
+            self.__misses = 0
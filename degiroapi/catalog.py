@@ -0,0 +1,128 @@
+import json
+import sqlite3
+import threading
+import time
+import datetime
+
+
+class ProductCatalog:
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            isin TEXT,
+            symbol TEXT,
+            vwd_id TEXT,
+            vwd_id_secondary TEXT,
+            close_price_date TEXT,
+            updated REAL NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS products_isin ON products (isin);
+        CREATE INDEX IF NOT EXISTS products_symbol ON products (symbol);
+        CREATE INDEX IF NOT EXISTS products_vwd_id ON products (vwd_id);
+        CREATE INDEX IF NOT EXISTS products_vwd_id_secondary ON products (vwd_id_secondary);
+    '''
+
+    def __init__(self, path='degiro_products.sqlite'):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__connection:
+            self.__connection.executescript(ProductCatalog.__SCHEMA)
+
+    @property
+    def path(self):
+        return self.__path
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self):
+        return self.__query_one('SELECT COUNT(*) FROM products', ())[0]
+
+    def __contains__(self, product_id):
+        return self.__query_one('SELECT 1 FROM products WHERE id = ?', (str(product_id),)) is not None
+
+    def add(self, products):
+        # only replace stored products with data that is at least as recent as the stored close price date
+        rows = []
+        now = time.time()
+        for product in products:
+            rows.append((str(product['id']), product.get('isin'), product.get('symbol'), product.get('vwdId'),
+                         product.get('vwdIdSecondary'), product.get('closePriceDate'), now, json.dumps(product)))
+        with self.__lock, self.__connection:
+            self.__connection.executemany('''
+                INSERT INTO products (id, isin, symbol, vwd_id, vwd_id_secondary, close_price_date, updated, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    isin = excluded.isin,
+                    symbol = excluded.symbol,
+                    vwd_id = excluded.vwd_id,
+                    vwd_id_secondary = excluded.vwd_id_secondary,
+                    close_price_date = excluded.close_price_date,
+                    updated = excluded.updated,
+                    data = excluded.data
+                WHERE products.close_price_date IS NULL
+                    OR excluded.close_price_date >= products.close_price_date
+            ''', rows)
+        return len(rows)
+
+    def get(self, product_id):
+        row = self.__query_one('SELECT data FROM products WHERE id = ?', (str(product_id),))
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, product_ids):
+        rows = self.__query_chunks('SELECT id, data FROM products WHERE id IN ({})', [str(p) for p in product_ids])
+        return {product_id: json.loads(data) for product_id, data in rows}
+
+    def by_isin(self, isin):
+        return self.__query_ids('SELECT id FROM products WHERE isin = ? ORDER BY id', (isin,))
+
+    def by_symbol(self, symbol):
+        return self.__query_ids('SELECT id FROM products WHERE symbol = ? ORDER BY id', (symbol,))
+
+    def by_vwd_id(self, vwd_id):
+        return self.__query_ids('SELECT id FROM products WHERE vwd_id = ? OR vwd_id_secondary = ? ORDER BY id',
+                                (str(vwd_id), str(vwd_id)))
+
+    def stale(self, as_of=None, product_ids=None):
+        # products whose close price is older than as_of (default: yesterday) or unknown, among product_ids if given
+        if as_of is None:
+            as_of = datetime.date.today() - datetime.timedelta(days=1)
+        if isinstance(as_of, datetime.datetime):
+            as_of = as_of.date()
+        sql = 'SELECT id FROM products WHERE (close_price_date IS NULL OR close_price_date < ?)'
+        if product_ids is None:
+            return self.__query_ids(sql, (as_of.isoformat(),))
+        rows = self.__query_chunks(sql + ' AND id IN ({})', [str(p) for p in product_ids], (as_of.isoformat(),))
+        return [row[0] for row in rows]
+
+    def refresh(self, degiro, as_of=None):
+        product_ids = self.stale(as_of)
+        if not product_ids:
+            return 0
+        for product_id in product_ids:
+            degiro.product_cache.invalidate(product_id)
+        return self.add(degiro.products_info(product_ids, use_catalog=False).values())
+
+    def remove(self, product_id):
+        with self.__lock, self.__connection:
+            self.__connection.execute('DELETE FROM products WHERE id = ?', (str(product_id),))
+
+    def __query_one(self, sql, params):
+        with self.__lock:
+            return self.__connection.execute(sql, params).fetchone()
+
+    def __query_chunks(self, sql, product_ids, params=(), size=500):
+        # the ids are bound in chunks, SQLite limits the number of variables of a statement
+        rows = []
+        with self.__lock:
+            for start in range(0, len(product_ids), size):
+                chunk = product_ids[start:start + size]
+                rows.extend(self.__connection.execute(sql.format(','.join('?' * len(chunk))), params + tuple(chunk)))
+        return rows
+
+    def __query_ids(self, sql, params):
+        with self.__lock:
+            return [row[0] for row in self.__connection.execute(sql, params)]
@@ -1,4 +1,6 @@
 class ClientInfo:
+    __slots__ = ('__account_id', '__username', '__first_name', '__last_name', '__email')
+
     def __init__(self, client_info):
         self.__account_id = client_info['intAccount']
         self.__username = client_info['username']
@@ -6,6 +8,14 @@ class ClientInfo:
         self.__last_name = client_info['firstContact']['lastName']
         self.__email = client_info['email']
 
+    def to_dict(self):
+        return {
+            'intAccount': self.__account_id,
+            'username': self.__username,
+            'firstContact': {'firstName': self.__first_name, 'lastName': self.__last_name},
+            'email': self.__email,
+        }
+
     @property
     def account_id(self):
         return self.__account_id
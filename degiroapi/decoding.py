@@ -0,0 +1,78 @@
+from degiroapi.records import Position
+
+PORTFOLIO_FIELDS = ('positionType', 'size', 'price', 'value', 'breakEvenPrice')
+CASHFUNDS_FIELDS = ('currencyCode', 'value')
+
+
+def decode_rows(items, fields):
+    # the rows of the update endpoint are lists of {'name', 'value'} pairs, usually in the same order for every row,
+    # so the position of each field is only looked up again when the names of a row differ from the previous one
+    columns = {field: [] for field in fields}
+    names = None
+    plan = absent = ()
+    for item in items:
+        values = item['value']
+        row_names = tuple(v['name'] for v in values)
+        if row_names != names:
+            names = row_names
+            index = {name: n for n, name in enumerate(names)}
+            plan = [(index[field], columns[field].append) for field in fields if field in index]
+            absent = [columns[field].append for field in fields if field not in index]
+        for i, append in plan:
+            append(values[i]['value'])
+        for append in absent:
+            append(None)
+    columns['id'] = [item['id'] for item in items]
+    return columns
+
+
+def decode_portfolio(portfolio):
+    return decode_rows(portfolio['portfolio']['value'], PORTFOLIO_FIELDS)
+
+
+def decode_cashfunds(cashfunds):
+    return decode_rows(cashfunds['cashFunds']['value'], CASHFUNDS_FIELDS)
+
+
+def product_ids(columns):
+    return [product_id for product_id, position_type in zip(columns['id'], columns['positionType'])
+            if position_type != 'CASH']
+
+
+def positions(columns, infos, filter_zero=None, as_records=False, as_frame=False):
+    names = []
+    symbols = []
+    position_types = []
+    for product_id, position_type in zip(columns['id'], columns['positionType']):
+        info = infos.get(str(product_id), {})
+        names.append(info.get('name', product_id))
+        symbols.append(info.get('symbol', position_type))
+        position_types.append(info.get('productType', position_type))
+    data = {
+        "id": columns['id'],
+        "name": names,
+        "symbol": symbols,
+        "positionType": position_types,
+        "size": columns['size'],
+        "price": columns['price'],
+        "value": columns['value'],
+        "breakEvenPrice": columns['breakEvenPrice'],
+    }
+
+    if as_frame:
+        import pandas as pd
+        df = pd.DataFrame(data)
+        for column in ('size', 'price', 'value', 'breakEvenPrice'):
+            df[column] = pd.to_numeric(df[column])
+        return df[df['size'] != 0.0].reset_index(drop=True) if filter_zero else df
+
+    keys = list(data)
+    rows = [dict(zip(keys, row)) for row in zip(*data.values())]
+    if filter_zero:
+        rows = [row for row in rows if row['size'] != 0.0]
+    return Position.from_dicts(rows) if as_records else rows
+
+
+def cash_balances(columns):
+    return {currency: float(value) for currency, value in zip(columns['currencyCode'], columns['value'])
+            if currency is not None}
@@ -0,0 +1,155 @@
+import datetime
+import random
+
+# the URLs and payloads shared by DeGiro and AsyncDeGiro
+
+TRADER_URL = 'https://trader.degiro.nl'
+CHARTING_URL = 'https://charting.vwdservices.com'
+
+LOGIN_URL = 'https://trader.degiro.nl/login/secure/login'
+LOGIN_TOTP_URL = 'https://trader.degiro.nl/login/secure/login/totp'
+CONFIG_URL = 'https://trader.degiro.nl/login/secure/config'
+
+LOGOUT_URL = 'https://trader.degiro.nl/trading/secure/logout'
+
+CLIENT_INFO_URL = 'https://trader.degiro.nl/pa/secure/client'
+
+GET_STOCKS_URL = 'https://trader.degiro.nl/products_s/secure/v5/stocks'
+PRODUCT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/lookup'
+PRODUCT_INFO_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/info'
+TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v4/transactions'
+TRANSACTIONS_CSV_URL = 'https://trader.degiro.nl/reporting/secure/v3/transactionReport/csv'
+ORDERS_URL = 'https://trader.degiro.nl/reporting/secure/v4/order-history'
+DIVIDENDS_URL = 'https://trader.degiro.nl/reporting/secure/v3/ca/'
+
+ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v6/accountoverview'
+ACCOUNT_CSV_URL = 'https://trader.degiro.nl/reporting/secure/v3/cashAccountReport/csv'
+PLACE_ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/checkOrder'
+ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/order/'
+
+DATA_URL = 'https://trader.degiro.nl/trading/secure/v5/update/'
+PRICE_DATA_URL = 'https://charting.vwdservices.com/hchart/v1/deGiro/data.js'
+
+COMPANY_RATIOS_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-ratios/'
+COMPANY_PROFILE_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-profile/v2/'
+
+LOGIN_URLS = (LOGIN_URL, LOGIN_TOTP_URL)
+# the requests of a login, they never renew the session themselves
+SESSION_URLS = (LOGIN_URL, LOGIN_TOTP_URL, CLIENT_INFO_URL, CONFIG_URL)
+
+# the order history accepts at most 90 days per request
+ORDERS_WINDOW_DAYS = 90
+
+
+def hosts(trader_url=None, charting_url=None):
+    # (default, override) pairs, e.g. to point the client at the stand-in server of the benchmarks
+    return [(default, url.rstrip('/')) for default, url in ((TRADER_URL, trader_url), (CHARTING_URL, charting_url))
+            if url]
+
+
+def rewrite(url, hosts):
+    for default, host in hosts:
+        if url.startswith(default):
+            return host + url[len(default):]
+    return url
+
+
+def replace_session(value, old, new):
+    if isinstance(value, str):
+        return value.replace(old, new)
+    if isinstance(value, dict):
+        return {k: replace_session(v, old, new) for k, v in value.items()}
+    return value
+
+
+def retry_delay(retry_after, attempt, backoff_factor, max_backoff):
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), max_backoff)
+    # full jitter, so the retrying clients do not hit the server at the same time again
+    return random.uniform(0, min(max_backoff, backoff_factor * 2 ** attempt))
+
+
+def validate_date(strordate):
+    if isinstance(strordate, datetime.datetime):
+        strordate = strordate.strftime('%d/%m/%Y')
+    else:
+        try:
+            strordate = datetime.datetime.strptime(strordate, '%d/%m/%Y').strftime('%d/%m/%Y')
+        except ValueError:
+            raise ValueError("Incorrect data format, should be DD-MM-YYYY")
+    return strordate
+
+
+def to_datetime(strordate):
+    if isinstance(strordate, datetime.datetime):
+        return strordate
+    return datetime.datetime.strptime(validate_date(strordate), '%d/%m/%Y')
+
+
+def session_url(url, session_id):
+    return url + ';jsessionid=' + session_id
+
+
+def data_url(account_id, session_id):
+    return session_url(DATA_URL + str(account_id), session_id)
+
+
+def vwd_id(info):
+    vw_id = info['vwdId']
+    try:
+        int(vw_id)
+    except:
+        vw_id = info['vwdIdSecondary']
+    return vw_id
+
+
+def login_payload(username, password, totp=None):
+    payload = {
+        'username': username,
+        'password': password,
+        'isPassCodeReset': False,
+        'isRedirectToMobile': False
+    }
+    if totp is not None:
+        payload["oneTimePassword"] = totp
+    return payload
+
+
+def account_payload(account_id, session_id, **fields):
+    payload = dict(fields)
+    payload['intAccount'] = account_id
+    payload['sessionId'] = session_id
+    return payload
+
+
+def date_payload(account_id, session_id, from_date, to_date, **fields):
+    return account_payload(account_id, session_id, fromDate=validate_date(from_date), toDate=validate_date(to_date),
+                           **fields)
+
+
+def report_payload(account_id, session_id, from_date, to_date, country, lang):
+    return date_payload(account_id, session_id, from_date, to_date, country=country, lang=lang)
+
+
+def search_payload(account_id, session_id, search_text, offset, limit, require_total=False):
+    payload = account_payload(account_id, session_id, searchText=search_text, limit=limit, offset=offset)
+    if require_total:
+        payload['requireTotal'] = "true"
+    return payload
+
+
+def stock_list_payload(account_id, session_id, index_id, stock_country_id, offset, limit):
+    return account_payload(account_id, session_id, indexId=index_id, stockCountryId=stock_country_id, offset=offset,
+                           limit=limit, requireTotal="true", sortColumns="name", sortTypes="asc")
+
+
+def price_payload(series, period, client_token, resolution=None):
+    payload = {
+        'requestid': 1,
+        'period': period,
+        'series': series,
+        'userToken': client_token
+    }
+    if resolution is not None:
+        payload['resolution'] = resolution
+    return payload
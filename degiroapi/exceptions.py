@@ -0,0 +1,41 @@
+class DeGiroError(Exception):
+    pass
+
+
+class RequestError(DeGiroError):
+    def __init__(self, message, status_code=None, url=None, response_text=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+        self.response_text = response_text
+
+
+class LoginError(RequestError):
+    pass
+
+
+class SessionExpiredError(RequestError):
+    pass
+
+
+class RateLimitError(RequestError):
+    pass
+
+
+class ServerError(RequestError):
+    pass
+
+
+def request_error(message, status_code, url, response_text, login=False):
+    if login and status_code in (400, 401, 403):
+        # only a rejection of the credentials, a rate limited or failing login can be retried with them
+        error = LoginError
+    elif status_code == 401:
+        error = SessionExpiredError
+    elif status_code == 429:
+        error = RateLimitError
+    elif status_code >= 500:
+        error = ServerError
+    else:
+        error = RequestError
+    return error(message, status_code, url, response_text)
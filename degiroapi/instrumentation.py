@@ -0,0 +1,191 @@
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# the upper bounds in seconds of the latency histogram buckets, the last bucket has no bound
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID = re.compile(r'\d')
+_VERSION = re.compile(r'^v\d+$')
+
+
+@lru_cache(maxsize=1024)
+def endpoint(url):
+    # the path without the session (;jsessionid=...) and with the account, order and isin segments replaced
+    path = urlsplit(url).path.split(';', 1)[0]
+    return '/'.join('{id}' if _ID.search(part) and not _VERSION.match(part) else part for part in path.split('/'))
+
+
+class RequestEvent:
+    __slots__ = ('endpoint', 'method', 'status_code', 'duration', 'request_bytes', 'response_bytes', 'retries',
+                 'decode_time', 'queue_time', 'error')
+
+    def __init__(self, endpoint, method, status_code=None, duration=0.0, request_bytes=0, response_bytes=0,
+                 retries=0, decode_time=0.0, queue_time=0.0, error=None):
+        self.endpoint = endpoint
+        self.method = method
+        self.status_code = status_code
+        self.duration = duration
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.retries = retries
+        self.decode_time = decode_time
+        self.queue_time = queue_time
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return (f'RequestEvent({self.method} {self.endpoint}, status_code={self.status_code}, '
+                f'duration={self.duration:.4f}, retries={self.retries}, error={self.error!r})')
+
+
+class EndpointStats:
+    __slots__ = ('calls', 'errors', 'retries', 'request_bytes', 'response_bytes', 'duration', 'decode_time',
+                 'queue_time', 'status_codes', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.duration = 0.0
+        self.decode_time = 0.0
+        self.queue_time = 0.0
+        self.status_codes = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, event):
+        self.calls += 1
+        self.errors += event.error is not None
+        self.retries += event.retries
+        self.request_bytes += event.request_bytes
+        self.response_bytes += event.response_bytes
+        self.duration += event.duration
+        self.decode_time += event.decode_time
+        self.queue_time += event.queue_time
+        self.status_codes[event.status_code] = self.status_codes.get(event.status_code, 0) + 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, event.duration)] += 1
+
+    def percentile(self, q):
+        # the upper bound of the bucket holding the q-th percentile, None when it is beyond the last bound
+        if not self.calls:
+            return None
+        rank = q / 100 * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'mean_duration': self.duration / self.calls if self.calls else 0.0,
+            'decode_time': self.decode_time,
+            'queue_time': self.queue_time,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'status_codes': dict(self.status_codes),
+        }
+
+
+class RequestMetrics:
+    # a hook collecting per-endpoint statistics: degiro.hooks.append(RequestMetrics())
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    def __call__(self, event):
+        key = (event.method, event.endpoint)
+        with self.__lock:
+            stats = self.__endpoints.get(key)
+            if stats is None:
+                stats = self.__endpoints[key] = EndpointStats()
+            stats.add(event)
+
+    def endpoint(self, method, endpoint):
+        return self.__endpoints.get((method, endpoint))
+
+    def summary(self):
+        with self.__lock:
+            return {f'{method} {endpoint}': stats.to_dict()
+                    for (method, endpoint), stats in sorted(self.__endpoints.items())}
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+
+
+class PrometheusExporter:
+    # a hook updating prometheus_client metrics, the package is only needed when the exporter is used
+    def __init__(self, registry=None, prefix='degiroapi'):
+        try:
+            from prometheus_client import Counter, Histogram, REGISTRY
+        except ImportError:
+            raise ImportError('PrometheusExporter requires prometheus_client, install it with: '
+                              'pip install prometheus_client')
+        registry = registry if registry is not None else REGISTRY
+        labels = ('method', 'endpoint')
+        self.__duration = Histogram(f'{prefix}_request_duration_seconds', 'Duration of the requests', labels,
+                                    buckets=LATENCY_BUCKETS, registry=registry)
+        self.__decode = Histogram(f'{prefix}_decode_duration_seconds', 'Time spent decoding the responses', labels,
+                                  buckets=LATENCY_BUCKETS, registry=registry)
+        self.__requests = Counter(f'{prefix}_requests', 'Requests by status code', labels + ('status_code',),
+                                  registry=registry)
+        self.__errors = Counter(f'{prefix}_request_errors', 'Failed requests by error', labels + ('error',),
+                                registry=registry)
+        self.__retries = Counter(f'{prefix}_request_retries', 'Retried requests', labels, registry=registry)
+        self.__request_bytes = Counter(f'{prefix}_request_bytes', 'Bytes sent', labels, registry=registry)
+        self.__response_bytes = Counter(f'{prefix}_response_bytes', 'Bytes received', labels, registry=registry)
+
+    def __call__(self, event):
+        labels = (event.method, event.endpoint)
+        self.__duration.labels(*labels).observe(event.duration)
+        self.__decode.labels(*labels).observe(event.decode_time)
+        self.__requests.labels(*labels, str(event.status_code)).inc()
+        if event.error is not None:
+            self.__errors.labels(*labels, event.error).inc()
+        if event.retries:
+            self.__retries.labels(*labels).inc(event.retries)
+        self.__request_bytes.labels(*labels).inc(event.request_bytes)
+        self.__response_bytes.labels(*labels).inc(event.response_bytes)
+
+
+class OpenTelemetryExporter:
+    # a hook recording OpenTelemetry metrics, the package is only needed when the exporter is used
+    def __init__(self, meter=None, prefix='degiroapi'):
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError('OpenTelemetryExporter requires opentelemetry-api, install it with: '
+                              'pip install opentelemetry-api')
+        meter = meter if meter is not None else metrics.get_meter('degiroapi')
+        self.__duration = meter.create_histogram(f'{prefix}.request.duration', unit='s')
+        self.__decode = meter.create_histogram(f'{prefix}.decode.duration', unit='s')
+        self.__requests = meter.create_counter(f'{prefix}.requests')
+        self.__retries = meter.create_counter(f'{prefix}.request.retries')
+        self.__request_bytes = meter.create_counter(f'{prefix}.request.bytes', unit='By')
+        self.__response_bytes = meter.create_counter(f'{prefix}.response.bytes', unit='By')
+
+    def __call__(self, event):
+        attributes = {'method': event.method, 'endpoint': event.endpoint, 'status_code': str(event.status_code)}
+        if event.error is not None:
+            attributes['error'] = event.error
+        self.__duration.record(event.duration, attributes)
+        self.__decode.record(event.decode_time, attributes)
+        self.__requests.add(1, attributes)
+        if event.retries:
+            self.__retries.add(event.retries, attributes)
+        self.__request_bytes.add(event.request_bytes, attributes)
+        self.__response_bytes.add(event.response_bytes, attributes)
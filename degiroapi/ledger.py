@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import datetime
+
+
+class Ledger:
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            account INTEGER NOT NULL,
+            id TEXT NOT NULL,
+            product_id TEXT,
+            date TEXT,
+            type TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (account, id)
+        );
+        CREATE INDEX IF NOT EXISTS transactions_product ON transactions (account, product_id, date);
+        CREATE INDEX IF NOT EXISTS transactions_date ON transactions (account, date);
+        CREATE INDEX IF NOT EXISTS transactions_type ON transactions (account, type, date);
+        CREATE TABLE IF NOT EXISTS cash_movements (
+            account INTEGER NOT NULL,
+            id TEXT NOT NULL,
+            product_id TEXT,
+            date TEXT,
+            type TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (account, id)
+        );
+        CREATE INDEX IF NOT EXISTS cash_movements_product ON cash_movements (account, product_id, date);
+        CREATE INDEX IF NOT EXISTS cash_movements_date ON cash_movements (account, date);
+        CREATE INDEX IF NOT EXISTS cash_movements_type ON cash_movements (account, type, date);
+        CREATE TABLE IF NOT EXISTS sync_cursors (
+            account INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            cursor TEXT NOT NULL,
+            PRIMARY KEY (account, kind)
+        );
+    '''
+    __TABLES = ('transactions', 'cash_movements')
+
+    def __init__(self, path='degiro_ledger.sqlite', start_date=datetime.datetime(2000, 1, 1), overlap_days=3):
+        self.__path = path
+        self.start_date = start_date
+        self.overlap_days = overlap_days
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__connection:
+            self.__connection.executescript(Ledger.__SCHEMA)
+
+    @property
+    def path(self):
+        return self.__path
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def cursor(self, account, kind):
+        with self.__lock:
+            row = self.__connection.execute('SELECT cursor FROM sync_cursors WHERE account = ? AND kind = ?',
+                                            (account, kind)).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row else None
+
+    def __from_date(self, account, kind):
+        # records newer than the last sync, with an overlap for late corrections
+        cursor = self.cursor(account, kind)
+        if cursor is None:
+            return self.start_date
+        return max(self.start_date, cursor - datetime.timedelta(days=self.overlap_days))
+
+    def sync(self, degiro, to_date=None, max_workers=4):
+        account = degiro.client_info.account_id
+        to_date = to_date or datetime.datetime.now()
+        transactions = degiro.iter_transactions(self.__from_date(account, 'transactions'), to_date,
+                                                max_workers=max_workers)
+        cash_movements = degiro.iter_cash_movements(self.__from_date(account, 'cash_movements'), to_date,
+                                                    max_workers=max_workers)
+        return {
+            'transactions': self.__store(account, 'transactions', transactions, to_date,
+                                         lambda t: t.get('buysell')),
+            'cash_movements': self.__store(account, 'cash_movements', cash_movements, to_date,
+                                           lambda c: c.get('type')),
+        }
+
+    def __store(self, account, kind, records, to_date, record_type):
+        rows = []
+        for record in records:
+            key = record.get('id')
+            if key is None:
+                key = hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
+            product_id = record.get('productId')
+            rows.append((account, str(key), str(product_id) if product_id is not None else None, record.get('date'),
+                         record_type(record), json.dumps(record)))
+        with self.__lock, self.__connection:
+            self.__connection.executemany(f'INSERT OR REPLACE INTO {kind} VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self.__connection.execute('INSERT OR REPLACE INTO sync_cursors VALUES (?, ?, ?)',
+                                      (account, kind, to_date.isoformat()))
+        return len(rows)
+
+    def __query(self, table, account, product_id, from_date, to_date, type):
+        sql = f'SELECT data FROM {table} WHERE account = ?'
+        params = [account]
+        if product_id is not None:
+            sql += ' AND product_id = ?'
+            params.append(str(product_id))
+        if type is not None:
+            sql += ' AND type = ?'
+            params.append(type)
+        if from_date is not None:
+            sql += ' AND date >= ?'
+            params.append(from_date.isoformat())
+        if to_date is not None:
+            # compare on the day so the records of to_date itself are included
+            sql += ' AND substr(date, 1, 10) <= ?'
+            params.append(to_date.strftime('%Y-%m-%d'))
+        sql += ' ORDER BY date'
+        with self.__lock:
+            return [json.loads(row[0]) for row in self.__connection.execute(sql, params)]
+
+    def transactions(self, account, product_id=None, from_date=None, to_date=None, type=None):
+        return self.__query('transactions', account, product_id, from_date, to_date, type)
+
+    def cash_movements(self, account, product_id=None, from_date=None, to_date=None, type=None):
+        return self.__query('cash_movements', account, product_id, from_date, to_date, type)
+
+    def count(self, account, kind='transactions'):
+        if kind not in Ledger.__TABLES:
+            raise ValueError(f'Unknown ledger table: {kind}')
+        with self.__lock:
+            return self.__connection.execute(f'SELECT COUNT(*) FROM {kind} WHERE account = ?', (account,)).fetchone()[0]
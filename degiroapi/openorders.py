@@ -0,0 +1,75 @@
+import threading
+
+from degiroapi.datatypes import Data
+
+
+class OpenOrderIndex:
+    def __init__(self, tracker=None):
+        self.__orders = {}
+        self.__by_product = {}
+        self.__lock = threading.Lock()
+        self.__tracker = tracker
+        if tracker is not None:
+            tracker.subscribe(self.__on_update)
+            self.load(tracker.orders())
+
+    def __on_update(self, datatype, changed, removed):
+        if datatype != Data.Type.ORDERS:
+            return
+        for order_id in removed:
+            self.remove(order_id)
+        for order_id in changed:
+            fields = self.__tracker.row(Data.Type.ORDERS, order_id)
+            if fields is not None:
+                fields.setdefault('id', order_id)
+                self.add(fields)
+
+    def load(self, orders):
+        # accepts the rows of the update endpoint and the records of the order history (only the active ones)
+        for order in orders:
+            if order.get('isActive', True):
+                self.add(order)
+
+    def add(self, order):
+        order_id = str(order.get('id') or order.get('orderId'))
+        product_id = str(order.get('productId'))
+        with self.__lock:
+            previous = self.__orders.get(order_id)
+            if previous is not None:
+                self.__by_product.get(str(previous.get('productId')), set()).discard(order_id)
+            self.__orders[order_id] = order
+            self.__by_product.setdefault(product_id, set()).add(order_id)
+
+    def remove(self, order_id):
+        order_id = str(order_id)
+        with self.__lock:
+            order = self.__orders.pop(order_id, None)
+            if order is not None:
+                order_ids = self.__by_product.get(str(order.get('productId')))
+                if order_ids is not None:
+                    order_ids.discard(order_id)
+                    if not order_ids:
+                        del self.__by_product[str(order.get('productId'))]
+        return order
+
+    def get(self, order_id):
+        return self.__orders.get(str(order_id))
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def __contains__(self, order_id):
+        return str(order_id) in self.__orders
+
+    def order_ids(self):
+        with self.__lock:
+            return list(self.__orders)
+
+    def by_product(self, product_id):
+        with self.__lock:
+            return [self.__orders[order_id] for order_id in self.__by_product.get(str(product_id), ())]
+
+    def select(self, predicate):
+        with self.__lock:
+            orders = list(self.__orders.items())
+        return [order_id for order_id, order in orders if predicate(order)]
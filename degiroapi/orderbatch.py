@@ -0,0 +1,66 @@
+from degiroapi.order import Order
+
+
+class OrderRequest:
+    __slots__ = ('buysell', 'order_type', 'product_id', 'time_type', 'size', 'limit', 'stop_loss')
+
+    def __init__(self, buysell, order_type, product_id, time_type, size, limit=None, stop_loss=None):
+        self.buysell = buysell
+        self.order_type = order_type
+        self.product_id = product_id
+        self.time_type = time_type
+        self.size = size
+        self.limit = limit
+        self.stop_loss = stop_loss
+
+    @classmethod
+    def buy(cls, order_type, product_id, time_type, size, limit=None, stop_loss=None):
+        return cls("BUY", order_type, product_id, time_type, size, limit, stop_loss)
+
+    @classmethod
+    def sell(cls, order_type, product_id, time_type, size, limit=None, stop_loss=None):
+        return cls("SELL", order_type, product_id, time_type, size, limit, stop_loss)
+
+    def payload(self):
+        return {
+            'buySell': self.buysell,
+            'orderType': self.order_type,
+            'productId': self.product_id,
+            'timeType': self.time_type,
+            'size': self.size,
+            'price': self.limit,
+            'stopPrice': self.stop_loss,
+        }
+
+    def errors(self):
+        errors = []
+        if self.buysell not in ("BUY", "SELL"):
+            errors.append('Invalid buy/sell side')
+        if self.order_type not in (Order.Type.LIMIT, Order.Type.STOPLIMIT, Order.Type.MARKET, Order.Type.STOPLOSS):
+            errors.append('Invalid order type')
+        if self.time_type != 1 and self.time_type != 3:
+            errors.append('Invalid time type')
+        return errors
+
+    def __repr__(self):
+        return (f'OrderRequest({self.buysell!r}, {self.order_type!r}, {self.product_id!r}, {self.time_type!r}, '
+                f'{self.size!r}, limit={self.limit!r}, stop_loss={self.stop_loss!r})')
+
+
+class OrderResult:
+    __slots__ = ('order', 'confirmation_id', 'order_id', 'error')
+
+    def __init__(self, order, confirmation_id=None, order_id=None, error=None):
+        self.order = order
+        self.confirmation_id = confirmation_id
+        self.order_id = order_id
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f'OrderResult({self.order!r}, confirmation_id={self.confirmation_id!r}, order_id={self.order_id!r})'
+        return f'OrderResult({self.order!r}, confirmation_id={self.confirmation_id!r}, error={self.error!r})'
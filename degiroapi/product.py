@@ -2,6 +2,9 @@ from datetime import datetime
 
 
 class Product:
+    __slots__ = ('__id', '__name', '__isin', '__symbol', '__currency', '__product_type', '__tradable', '__close_price',
+                 '__close_price_date')
+
     def __init__(self, product):
         self.__id = product['id']
         self.__name = product['name']
@@ -14,6 +17,13 @@ class Product:
         close_price_date = product.get('closePriceDate')
         self.__close_price_date = datetime.strptime(close_price_date, '%Y-%m-%d').date() if close_price_date else None
 
+    @classmethod
+    def from_catalog(cls, catalog, product_id):
+        product = catalog.get(product_id)
+        if product is None:
+            raise KeyError(f'Product {product_id} is not in the catalog')
+        return cls(product)
+
     @property
     def id(self):
         return self.__id
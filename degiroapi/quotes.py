@@ -0,0 +1,92 @@
+import threading
+import time
+
+import requests
+
+from degiroapi.intervaltypes import Interval
+from degiroapi.exceptions import RateLimitError, ServerError
+
+
+class QuoteSubscription:
+    def __init__(self, degiro, product_ids, poll_interval=1.0, batch_size=100, max_backoff=60.0, callback=None,
+                 period=Interval.Type.One_Day):
+        self.__degiro = degiro
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.callback = callback
+        self.period = period
+        self.__last = {}
+        self.__stopped = threading.Event()
+        # the vwdIds are resolved once with batched product info requests
+        self.__vwd_ids = degiro.vwd_ids(product_ids)
+        self.__product_ids = {'issueid:' + vwd_id: product_id for product_id, vwd_id in self.__vwd_ids.items()}
+
+    @property
+    def product_ids(self):
+        return list(self.__vwd_ids)
+
+    @property
+    def last(self):
+        return dict(self.__last)
+
+    def add(self, product_ids):
+        vwd_ids = self.__degiro.vwd_ids(product_ids)
+        self.__vwd_ids.update(vwd_ids)
+        self.__product_ids.update({'issueid:' + vwd_id: product_id for product_id, vwd_id in vwd_ids.items()})
+
+    def remove(self, product_ids):
+        for product_id in product_ids:
+            vwd_id = self.__vwd_ids.pop(str(product_id), None)
+            if vwd_id is not None:
+                self.__product_ids.pop('issueid:' + vwd_id, None)
+            self.__last.pop(str(product_id), None)
+
+    def poll(self):
+        # one request per batch of issues, only the quotes that changed since the previous poll are returned
+        changed = []
+        series = list(self.__product_ids)
+        for start in range(0, len(series), self.batch_size):
+            for item in self.__degiro.vwd_series(series[start:start + self.batch_size], self.period):
+                product_id = self.__product_ids.get(item.get('id'))
+                data = item.get('data')
+                if product_id is None or not isinstance(data, dict):
+                    continue
+                if self.__last.get(product_id) != data:
+                    self.__last[product_id] = data
+                    changed.append((product_id, data))
+        return changed
+
+    def stop(self):
+        self.__stopped.set()
+
+    @property
+    def stopped(self):
+        return self.__stopped.is_set()
+
+    def __iter__(self):
+        backoff = self.poll_interval
+        self.__stopped.clear()
+        while not self.__stopped.is_set():
+            started = time.monotonic()
+            try:
+                changed = self.poll()
+            except (RateLimitError, ServerError, requests.ConnectionError, requests.Timeout):
+                # back off exponentially while the feed fails, reset on the next successful poll, other errors
+                # (an invalid session, malformed data) would fail every poll and are raised
+                backoff = min(backoff * 2, self.max_backoff)
+                self.__stopped.wait(backoff)
+                continue
+            backoff = self.poll_interval
+            for tick in changed:
+                yield tick
+            self.__stopped.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def run(self):
+        for product_id, data in self:
+            self.callback(product_id, data)
+
+    def start(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,152 @@
+import itertools
+import threading
+import time
+
+from degiroapi.instrumentation import endpoint
+
+# (path prefix, family), the first match wins
+FAMILIES = (
+    ('/trading/secure/v5/checkOrder', 'trading'),
+    ('/trading/secure/v5/order/', 'trading'),
+    ('/trading/secure/v5/update/', 'data'),
+    ('/trading/secure/logout', 'session'),
+    ('/login/', 'session'),
+    ('/pa/secure/client', 'session'),
+    ('/reporting/', 'reporting'),
+    ('/product_search/', 'products'),
+    ('/products_s/', 'products'),
+    ('/dgtbxdsservice/', 'company'),
+    ('/hchart/', 'charting'),
+)
+
+# a lower number goes first, only priority 0 may use the reserved tokens of the shared bucket
+PRIORITIES = {'trading': 0, 'session': 0, 'data': 1, 'reporting': 2, 'charting': 2, 'other': 2, 'products': 3,
+              'company': 3}
+
+# (requests per second, burst) per family, on top of the shared bucket
+LIMITS = {'reporting': (5, 10), 'charting': (5, 10), 'products': (5, 10), 'company': (5, 10)}
+
+
+def family(url):
+    path = endpoint(url)
+    for prefix, name in FAMILIES:
+        if path.startswith(prefix):
+            return name
+    return 'other'
+
+
+class TokenBucket:
+    # not thread safe, the scheduler holds its lock
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.__tokens = float(self.burst)
+        self.__updated = time.monotonic()
+
+    def __refill(self, now):
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def delay(self, now, reserve=0):
+        # seconds until a token can be taken without going below the reserve
+        self.__refill(now)
+        missing = 1 + reserve - self.__tokens
+        return missing / self.rate if missing > 0 else 0
+
+    def take(self):
+        self.__tokens -= 1
+
+
+class FamilyStats:
+    __slots__ = ('requests', 'waiting', 'max_waiting', 'wait_time', 'max_wait')
+
+    def __init__(self):
+        self.requests = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'mean_wait': self.wait_time / self.requests if self.requests else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+
+class RequestScheduler:
+    def __init__(self, rate=10, burst=20, reserve=4, limits=None, priorities=None):
+        # rate/burst is the budget shared by all requests, reserve tokens of it are kept for trading and session calls
+        if rate and reserve >= burst:
+            raise ValueError('The reserve has to be smaller than the burst')
+        self.reserve = reserve
+        self.priorities = dict(PRIORITIES, **(priorities or {}))
+        self.__total = TokenBucket(rate, burst) if rate else None
+        self.__buckets = {name: TokenBucket(*limit) for name, limit in
+                          (LIMITS if limits is None else limits).items() if limit}
+        self.__condition = threading.Condition()
+        self.__waiting = []
+        self.__sequence = itertools.count()
+        self.__stats = {}
+
+    def acquire(self, url):
+        # blocks until the request may be sent, returns the seconds it waited
+        name = family(url)
+        ticket = (self.priorities.get(name, 2), next(self.__sequence), name)
+        start = time.monotonic()
+        with self.__condition:
+            stats = self.__stats.get(name)
+            if stats is None:
+                stats = self.__stats[name] = FamilyStats()
+            stats.waiting += 1
+            stats.max_waiting = max(stats.max_waiting, stats.waiting)
+            self.__waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self.__delay(ticket, now)
+                    if delay == 0:
+                        break
+                    self.__condition.wait(delay)
+                bucket = self.__buckets.get(name)
+                if bucket is not None:
+                    bucket.take()
+                if self.__total is not None:
+                    self.__total.take()
+            finally:
+                self.__waiting.remove(ticket)
+                stats.waiting -= 1
+                self.__condition.notify_all()
+            waited = time.monotonic() - start
+            stats.requests += 1
+            stats.wait_time += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        return waited
+
+    def __delay(self, ticket, now):
+        # 0 when the ticket can go, the seconds to wait for its buckets, or None to wait for another request
+        priority, _, name = ticket
+        bucket = self.__buckets.get(name)
+        delay = bucket.delay(now) if bucket is not None else 0
+        if delay:
+            return delay
+        # a request ahead in the queue goes first, unless it is held back by the limit of its own family
+        for other in self.__waiting:
+            if other < ticket:
+                other_bucket = self.__buckets.get(other[2])
+                if other_bucket is None or not other_bucket.delay(now):
+                    return None
+        if self.__total is None:
+            return 0
+        return self.__total.delay(now, 0 if priority == 0 else self.reserve)
+
+    def stats(self):
+        with self.__condition:
+            return {name: stats.to_dict() for name, stats in sorted(self.__stats.items())}
+
+    @property
+    def queue_depth(self):
+        return len(self.__waiting)
@@ -0,0 +1,95 @@
+from operator import attrgetter
+
+import numpy as np
+
+
+class Record:
+    __slots__ = ()
+    # (attribute, key in the server response) pairs, in the order of __slots__
+    FIELDS = ()
+
+    def __init__(self, *values, **kwargs):
+        for (attribute, _), value in zip(self.FIELDS, values):
+            setattr(self, attribute, value)
+        for attribute, _ in self.FIELDS[len(values):]:
+            setattr(self, attribute, kwargs.pop(attribute, None))
+        if kwargs:
+            raise TypeError(f'Unknown fields for {type(self).__name__}: {", ".join(kwargs)}')
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*[data.get(key) for _, key in cls.FIELDS])
+
+    @classmethod
+    def from_dicts(cls, data):
+        return [cls.from_dict(d) for d in data]
+
+    def to_dict(self):
+        return {attribute: getattr(self, attribute) for attribute, _ in self.FIELDS}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, a) == getattr(other, a) for a, _ in self.FIELDS)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({", ".join(f"{a}={getattr(self, a)!r}" for a, _ in self.FIELDS)})'
+
+
+class Position(Record):
+    __slots__ = ('id', 'name', 'symbol', 'position_type', 'size', 'price', 'value', 'break_even_price')
+    FIELDS = (('id', 'id'), ('name', 'name'), ('symbol', 'symbol'), ('position_type', 'positionType'),
+              ('size', 'size'), ('price', 'price'), ('value', 'value'), ('break_even_price', 'breakEvenPrice'))
+
+
+class OrderRecord(Record):
+    __slots__ = ('order_id', 'product_id', 'created', 'buysell', 'size', 'price', 'stop_price', 'order_type',
+                 'time_type', 'status', 'is_active')
+    FIELDS = (('order_id', 'orderId'), ('product_id', 'productId'), ('created', 'created'), ('buysell', 'buysell'),
+              ('size', 'size'), ('price', 'price'), ('stop_price', 'stopPrice'), ('order_type', 'orderTypeId'),
+              ('time_type', 'orderTimeTypeId'), ('status', 'status'), ('is_active', 'isActive'))
+
+
+class Transaction(Record):
+    __slots__ = ('id', 'product_id', 'date', 'buysell', 'price', 'quantity', 'total', 'total_in_base_currency',
+                 'fee_in_base_currency', 'fx_rate', 'transaction_type_id')
+    FIELDS = (('id', 'id'), ('product_id', 'productId'), ('date', 'date'), ('buysell', 'buysell'),
+              ('price', 'price'), ('quantity', 'quantity'), ('total', 'total'),
+              ('total_in_base_currency', 'totalInBaseCurrency'), ('fee_in_base_currency', 'feeInBaseCurrency'),
+              ('fx_rate', 'fxRate'), ('transaction_type_id', 'transactionTypeId'))
+
+
+class Quote(Record):
+    __slots__ = ('product_id', 'last_price', 'last_time', 'bid_price', 'ask_price', 'open_price', 'high_price',
+                 'low_price', 'close_price')
+    FIELDS = (('product_id', 'productId'), ('last_price', 'lastPrice'), ('last_time', 'lastTime'),
+              ('bid_price', 'bidPrice'), ('ask_price', 'askPrice'), ('open_price', 'openPrice'),
+              ('high_price', 'highPrice'), ('low_price', 'lowPrice'), ('close_price', 'closePrice'))
+
+    @classmethod
+    def from_quote(cls, product_id, data):
+        quote = cls.from_dict(data)
+        quote.product_id = product_id
+        return quote
+
+
+def columns(records, fields=None):
+    # one pass per column over the records, without building an intermediate dict per record
+    records = list(records)
+    if not records:
+        return {}
+    fields = fields or [attribute for attribute, _ in records[0].FIELDS]
+    return {field: list(map(attrgetter(field), records)) for field in fields}
+
+
+def to_frame(records, fields=None):
+    import pandas as pd
+    return pd.DataFrame(columns(records, fields))
+
+
+def to_numpy(records, fields=None):
+    data = columns(records, fields)
+    arrays = {field: np.asarray(values) for field, values in data.items()}
+    array = np.empty(len(next(iter(arrays.values()))) if arrays else 0,
+                     dtype=[(field, values.dtype) for field, values in arrays.items()])
+    for field, values in arrays.items():
+        array[field] = values
+    return array
@@ -0,0 +1,28 @@
+import csv
+
+
+def report_decimal(lang):
+    return '.' if lang == 'en' else ','
+
+
+def read_report(stream, decimal=',', engine=None, dtype=None, date_format='%d-%m-%Y'):
+    import pandas as pd
+
+    # the first two columns of every report are the date and the time, whatever the language of the headers
+    header = stream.readline()
+    if isinstance(header, bytes):
+        header = header.decode('utf-8-sig')
+    if not header.strip():
+        return pd.DataFrame(columns=['Date'])
+    names = [name or f'Unnamed: {i}' for i, name in enumerate(next(csv.reader([header])))]
+
+    dtypes = {names[0]: str, names[1]: str}
+    dtypes.update(dtype or {})
+    df = pd.read_csv(stream, header=None, names=names, decimal=decimal, dtype=dtypes, engine=engine)
+
+    # a report only has a few distinct days and times, convert the distinct values and broadcast them
+    date = pd.to_datetime(df.pop(names[0]), format=date_format, cache=True)
+    codes, times = pd.factorize(df.pop(names[1]).fillna('00:00'))
+    time = pd.to_timedelta(times + ':00').values[codes]
+    df.insert(loc=0, column='Date', value=date + time)
+    return df
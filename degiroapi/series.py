@@ -0,0 +1,66 @@
+import re
+
+import numpy as np
+
+_DURATION = re.compile(r'^P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$')
+
+COLUMNS = {
+    'price': ('price',),
+    'ohlc': ('open', 'high', 'low', 'close'),
+}
+
+
+def period(interval):
+    # the Interval.Type values are one element tuples
+    return interval[0] if isinstance(interval, tuple) else interval
+
+
+def parse_duration(duration):
+    match = _DURATION.match(duration)
+    if match is None:
+        raise ValueError(f'Invalid ISO 8601 duration: {duration}')
+    years, months, weeks, days, hours, minutes, seconds = (float(g) if g else 0 for g in match.groups())
+    calendar_months = int(years * 12 + months)
+    fixed = np.timedelta64(int(round((((weeks * 7 + days) * 24 + hours) * 60 + minutes) * 60000 + seconds * 1000)),
+                           'ms')
+    return calendar_months, fixed
+
+
+def decode_times(times, offsets):
+    # times is '<start>/<resolution>', the offsets are counted in resolution steps from the start
+    start, resolution = times.split('/')
+    start = np.datetime64(start.rstrip('Z'), 'ms')
+    months, fixed = parse_duration(resolution)
+    offsets = np.asarray(offsets)
+    if months:
+        # step from the month start and keep the day of the start, clamped to the last day of shorter months
+        month_start = start.astype('datetime64[M]')
+        day = start.astype('datetime64[D]')
+        steps = (offsets * months).astype(np.int64)
+        months_at = month_start + steps
+        month_days = (months_at + 1).astype('datetime64[D]') - months_at.astype('datetime64[D]')
+        days = np.minimum(day - month_start.astype('datetime64[D]'), month_days - np.timedelta64(1, 'D'))
+        result = (months_at.astype('datetime64[D]') + days).astype('datetime64[ms]') + \
+            (start - day.astype('datetime64[ms]'))
+        if fixed:
+            result = result + (offsets * fixed.astype(np.int64)).astype(np.int64).astype('timedelta64[ms]')
+        return result
+    return start + (offsets * fixed.astype(np.int64)).astype(np.int64).astype('timedelta64[ms]')
+
+
+def decode_series(series, as_frame=True):
+    kind = series.get('id', 'price').split(':', 1)[0]
+    values = np.asarray(series.get('data') or [], dtype=np.float64)
+    if values.ndim != 2:
+        values = values.reshape(0, len(COLUMNS.get(kind, ('price',))) + 1)
+    columns = COLUMNS.get(kind) or tuple(f'value{i}' for i in range(1, values.shape[1]))
+    times = decode_times(series['times'], values[:, 0])
+
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame(values[:, 1:], index=pd.DatetimeIndex(times, name='time'), columns=list(columns))
+    array = np.empty(len(times), dtype=[('time', 'datetime64[ms]')] + [(c, np.float64) for c in columns])
+    array['time'] = times
+    for i, column in enumerate(columns, start=1):
+        array[column] = values[:, i]
+    return array
@@ -0,0 +1,36 @@
+import json
+import os
+
+
+class SessionStore:
+    def __init__(self, path=os.path.join('~', '.degiroapi', 'session.json')):
+        self.__path = os.path.expanduser(path)
+
+    @property
+    def path(self):
+        return self.__path
+
+    def save(self, session_id, client_token, client_info):
+        # the file holds a live session, it is only readable by the current user
+        directory = os.path.dirname(self.__path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        temporary = self.__path + '.tmp'
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'sessionId': session_id, 'clientToken': client_token, 'clientInfo': client_info}, f)
+        os.chmod(temporary, 0o600)
+        os.replace(temporary, self.__path)
+
+    def load(self):
+        try:
+            with open(self.__path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def clear(self):
+        try:
+            os.remove(self.__path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+from degiroapi.datatypes import Data
+from degiroapi.decoding import PORTFOLIO_FIELDS, product_ids, positions
+
+
+class UpdateTracker:
+    def __init__(self, degiro, datatypes=(Data.Type.PORTFOLIO, Data.Type.CASHFUNDS, Data.Type.ORDERS)):
+        self.__degiro = degiro
+        self.__datatypes = tuple(datatypes)
+        self.__tokens = {datatype: 0 for datatype in self.__datatypes}
+        self.__state = {datatype: OrderedDict() for datatype in self.__datatypes}
+        self.__listeners = []
+        self.__lock = threading.RLock()
+        # the client validates its orders against the cash funds followed here
+        if Data.Type.CASHFUNDS in self.__datatypes and getattr(degiro, 'tracker', False) is None:
+            degiro.tracker = self
+
+    @property
+    def datatypes(self):
+        return self.__datatypes
+
+    @property
+    def tokens(self):
+        return dict(self.__tokens)
+
+    def subscribe(self, listener):
+        # listener(datatype, changed_ids, removed_ids) is called after every poll that changed the datatype
+        self.__listeners.append(listener)
+
+    def reset(self, datatype=None):
+        with self.__lock:
+            for d in ([datatype] if datatype else self.__datatypes):
+                self.__tokens[d] = 0
+                self.__state[d].clear()
+
+    def poll(self):
+        # one request for all datatypes, the server only returns the rows changed since the sent tokens
+        with self.__lock:
+            response = self.__degiro.update(self.__tokens)
+            changes = {}
+            for datatype in self.__datatypes:
+                section = response.get(datatype) if isinstance(response, dict) else None
+                if section:
+                    changes[datatype] = self.__apply(datatype, section)
+        for datatype, (changed, removed) in changes.items():
+            if changed or removed:
+                for listener in self.__listeners:
+                    listener(datatype, changed, removed)
+        return changes
+
+    def __apply(self, datatype, section):
+        state = self.__state[datatype]
+        if self.__tokens[datatype] == 0:
+            state.clear()
+        self.__tokens[datatype] = section.get('lastUpdated', self.__tokens[datatype])
+        changed = []
+        removed = []
+        for row in section.get('value') or []:
+            row_id = str(row.get('id'))
+            if row.get('isRemoved'):
+                if state.pop(row_id, None) is not None:
+                    removed.append(row_id)
+                continue
+            fields = state.get(row_id)
+            if fields is None:
+                fields = state[row_id] = {}
+            values = row.get('value')
+            if isinstance(values, list):
+                for v in values:
+                    fields[v['name']] = v.get('value')
+            changed.append(row_id)
+        return changed, removed
+
+    def rows(self, datatype):
+        with self.__lock:
+            return {row_id: dict(fields) for row_id, fields in self.__state[datatype].items()}
+
+    def row(self, datatype, row_id):
+        with self.__lock:
+            fields = self.__state[datatype].get(str(row_id))
+            return dict(fields) if fields is not None else None
+
+    def columns(self, datatype, fields):
+        with self.__lock:
+            rows = self.__state[datatype]
+            columns = {field: [r.get(field) for r in rows.values()] for field in fields}
+            columns['id'] = list(rows)
+        return columns
+
+    def portfolio(self, filter_zero=None, as_records=False, as_frame=False):
+        columns = self.columns(Data.Type.PORTFOLIO, PORTFOLIO_FIELDS)
+        ids = product_ids(columns)
+        infos = self.__degiro.products_info(ids) if ids else {}
+        return positions(columns, infos, filter_zero, as_records, as_frame)
+
+    def cash_balances(self):
+        with self.__lock:
+            return {fields['currencyCode']: float(fields.get('value') or 0.0)
+                    for fields in self.__state[Data.Type.CASHFUNDS].values() if fields.get('currencyCode')}
+
+    def orders(self):
+        return list(self.rows(Data.Type.ORDERS).values())
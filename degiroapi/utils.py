@@ -1,5 +1,18 @@
 import json
+from datetime import timedelta
 
 
 def pretty_json(data):
     return json.dumps(data, indent=4, sort_keys=True)
+
+
+def date_windows(from_date, to_date, days):
+    # consecutive, non overlapping windows of at most `days` days covering [from_date, to_date]
+    windows = []
+    start = from_date
+    while True:
+        end = min(start + timedelta(days=days), to_date)
+        windows.append((start, end))
+        if end >= to_date:
+            return windows
+        start = end + timedelta(days=1)
@@ -0,0 +1,92 @@
+from numbers import Number
+
+from degiroapi.order import Order
+from degiroapi.exceptions import DeGiroError
+
+
+class OrderValidationError(DeGiroError):
+    def __init__(self, errors):
+        super().__init__(', '.join(errors))
+        self.errors = errors
+
+
+class OrderValidator:
+    # order types and the prices they require (limit, stop_loss)
+    __PRICES = {
+        Order.Type.LIMIT: (True, False),
+        Order.Type.STOPLIMIT: (True, True),
+        Order.Type.MARKET: (False, False),
+        Order.Type.STOPLOSS: (False, True),
+    }
+
+    def __init__(self, product_cache=None, cash=None, max_size=None, max_notional=None):
+        self.product_cache = product_cache
+        self.cash = cash
+        self.max_size = max_size
+        self.max_notional = max_notional
+
+    def validate(self, order, product=None, cash=None):
+        # every problem of the order is reported, nothing is sent to the server; cash overrides self.cash
+        return self.__validate(order, product, cash if cash is not None else self.cash)[0]
+
+    def validate_batch(self, orders, cash=None):
+        # the buys of a batch share the cash, each accepted buy is deducted from a running balance per currency
+        cash = cash if cash is not None else self.cash
+        cash = dict(cash) if cash is not None else None
+        results = []
+        for order in orders:
+            errors, currency, notional = self.__validate(order, None, cash)
+            if not errors and notional is not None and cash is not None and order.buysell == "BUY" \
+                    and currency in cash:
+                cash[currency] -= notional
+            results.append(errors)
+        return results
+
+    def __validate(self, order, product, cash):
+        errors = order.errors()
+
+        prices = OrderValidator.__PRICES.get(order.order_type)
+        if prices is not None:
+            for name, value, required in (('limit', order.limit, prices[0]), ('stop_loss', order.stop_loss, prices[1])):
+                if required and not self.__positive(value):
+                    errors.append(f'A positive {name} price is required for this order type')
+                elif not required and value is not None:
+                    errors.append(f'A {name} price is not allowed for this order type')
+
+        if not self.__positive(order.size):
+            errors.append('The size must be a positive number')
+        elif self.max_size is not None and order.size > self.max_size:
+            errors.append(f'The size exceeds the maximum of {self.max_size}')
+
+        if product is None and self.product_cache is not None:
+            product = self.product_cache.get(order.product_id, count=False)
+        currency = notional = None
+        if product is not None:
+            if not product.get('tradable', True):
+                errors.append(f'Product {order.product_id} is not tradable')
+            if product.get('productTypeId') == 1 and self.__positive(order.size) and order.size != int(order.size):
+                errors.append('Stocks can only be traded in whole units')
+            currency, notional = self.__check_notional(order, product, cash, errors)
+        return errors, currency, notional
+
+    def __check_notional(self, order, product, cash, errors):
+        price = order.limit or order.stop_loss or product.get('closePrice')
+        currency = product.get('currency')
+        if not self.__positive(price) or not self.__positive(order.size):
+            return currency, None
+        notional = order.size * price
+        if self.max_notional is not None and notional > self.max_notional:
+            errors.append(f'The notional of {notional:.2f} exceeds the maximum of {self.max_notional}')
+        if order.buysell == "BUY" and cash is not None and currency in cash and notional > cash[currency]:
+            errors.append(f'The notional of {notional:.2f} {currency} exceeds the available cash of '
+                          f'{cash[currency]:.2f} {currency}')
+        return currency, notional
+
+    def check(self, order, product=None, cash=None):
+        errors = self.validate(order, product, cash)
+        if errors:
+            raise OrderValidationError(errors)
+
+    @staticmethod
+    def __positive(value):
+        return isinstance(value, Number) and not isinstance(value, bool) and value > 0
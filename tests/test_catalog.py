@@ -0,0 +1,78 @@
+import datetime
+import json
+import unittest
+
+from degiroapi import DeGiro
+from degiroapi.catalog import ProductCatalog
+from degiroapi.client_info import ClientInfo
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.data = data
+        self.text = json.dumps(data)
+        self.content = self.text.encode()
+        self.headers = {}
+        self.request = None
+
+    def json(self):
+        return self.data
+
+
+class ProductInfoSession:
+    # answers the product info requests with products closed on close_price_date
+    def __init__(self, close_price_date):
+        self.close_price_date = close_price_date
+        self.requested = []
+
+    def post(self, url, data=None, **kwargs):
+        ids = json.loads(data)
+        self.requested.extend(ids)
+        return FakeResponse({'data': {p: {'id': p, 'vwdId': '1' + p, 'closePriceDate': self.close_price_date}
+                                      for p in ids}})
+
+
+def client(catalog, session):
+    degiro = DeGiro(session=session, catalog=catalog)
+    degiro.client_info = ClientInfo({'intAccount': 1, 'username': 'user', 'email': 'user@example.com',
+                                     'firstContact': {'firstName': 'First', 'lastName': 'Last'}})
+    degiro.session_id = 'session'
+    return degiro
+
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = ProductCatalog(':memory:')
+        self.today = datetime.date.today().isoformat()
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_restart_reads_the_catalog(self):
+        session = ProductInfoSession(self.today)
+        client(self.catalog, session).products_info(['1', '2'])
+        # a new client has an empty product cache, the products are read from the catalog
+        restarted = client(self.catalog, session)
+        self.assertEqual(restarted.vwd_ids(['1', '2', '3']), {'1': '11', '2': '12', '3': '13'})
+        self.assertEqual(session.requested, ['1', '2', '3'])
+
+    def test_stale_products_are_fetched_again(self):
+        self.catalog.add([{'id': '1', 'vwdId': '11', 'closePriceDate': '2000-01-01'},
+                          {'id': '2', 'vwdId': '12', 'closePriceDate': self.today}])
+        session = ProductInfoSession(self.today)
+        infos = client(self.catalog, session).products_info(['1', '2'])
+        self.assertEqual(session.requested, ['1'])
+        self.assertEqual(infos['1']['closePriceDate'], self.today)
+        self.assertEqual(self.catalog.stale(product_ids=['1', '2']), [])
+
+    def test_refresh_skips_the_catalog(self):
+        self.catalog.add([{'id': '1', 'closePriceDate': self.today}])
+        session = ProductInfoSession(self.today)
+        as_of = datetime.date.today() + datetime.timedelta(days=1)
+        self.assertEqual(self.catalog.refresh(client(self.catalog, session), as_of), 1)
+        self.assertEqual(session.requested, ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
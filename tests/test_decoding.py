@@ -0,0 +1,28 @@
+import unittest
+
+from degiroapi.decoding import decode_rows
+
+
+def row(row_id, **values):
+    return {'id': row_id, 'value': [{'name': name, 'value': value} for name, value in values.items()]}
+
+
+class DecodeRowsTest(unittest.TestCase):
+    def test_same_layout(self):
+        columns = decode_rows([row(1, a=1, b=2), row(2, a=3, b=4)], ('a', 'b'))
+        self.assertEqual(columns, {'a': [1, 3], 'b': [2, 4], 'id': [1, 2]})
+
+    def test_mixed_layouts(self):
+        # the second row has the same length as the first but contains b instead of x
+        items = [row(1, a=1, x=2), row(2, a=3, b=4), row(3, b=5, a=6), row(4, a=7)]
+        columns = decode_rows(items, ('a', 'b'))
+        self.assertEqual(columns['a'], [1, 3, 6, 7])
+        self.assertEqual(columns['b'], [None, 4, 5, None])
+        self.assertEqual(columns['id'], [1, 2, 3, 4])
+
+    def test_no_rows(self):
+        self.assertEqual(decode_rows([], ('a',)), {'a': [], 'id': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import unittest
+
+from degiroapi import DeGiro, Order, OrderRequest, OrderValidationError
+from degiroapi.client_info import ClientInfo
+from degiroapi.tracker import UpdateTracker
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.data = data
+        self.text = json.dumps(data)
+        self.content = self.text.encode()
+        self.headers = {}
+        self.request = None
+
+    def json(self):
+        return self.data
+
+
+class TradingSession:
+    # 100 EUR of cash, every order is accepted
+    def __init__(self, cash=100.0):
+        self.cash = cash
+        self.cash_requests = 0
+        self.orders = 0
+
+    def get(self, url, params=None, **kwargs):
+        if '/trading/secure/v5/update/' in url:
+            if (params or {}).get('cashFunds') == 0:
+                self.cash_requests += 1
+            return FakeResponse({'cashFunds': {'lastUpdated': 1, 'value': [{'id': '1', 'value': [
+                {'name': 'id', 'value': 1}, {'name': 'currencyCode', 'value': 'EUR'},
+                {'name': 'value', 'value': self.cash}]}]}})
+        return FakeResponse({})
+
+    def post(self, url, **kwargs):
+        self.orders += 1
+        return FakeResponse({'data': {'confirmationId': f'confirmation{self.orders}', 'orderId': 'order'}})
+
+
+def client(session):
+    degiro = DeGiro(session=session)
+    degiro.client_info = ClientInfo({'intAccount': 1, 'username': 'user', 'email': 'user@example.com',
+                                     'firstContact': {'firstName': 'First', 'lastName': 'Last'}})
+    degiro.session_id = 'session'
+    degiro.product_cache.put(1, {'id': '1', 'currency': 'EUR', 'closePrice': 10.0, 'productTypeId': 1})
+    return degiro
+
+
+def buy(size):
+    return OrderRequest.buy(Order.Type.LIMIT, 1, 3, size, limit=10.0)
+
+
+class OrderCashTest(unittest.TestCase):
+    def test_cash_is_fetched_when_unknown(self):
+        session = TradingSession()
+        degiro = client(session)
+        results = degiro.place_orders([buy(6), buy(6)])
+        self.assertTrue(results[0].ok)
+        self.assertIsInstance(results[1].error, OrderValidationError)
+        self.assertEqual(session.cash_requests, 1)
+        # the buy spent cash, the next order fetches it again
+        with self.assertRaises(OrderValidationError):
+            degiro.buyorder(Order.Type.LIMIT, 1, 3, 11, 10.0)
+        self.assertEqual(session.cash_requests, 2)
+
+    def test_cash_of_the_last_response(self):
+        session = TradingSession()
+        degiro = client(session)
+        degiro.getdata('cashFunds')
+        self.assertEqual(degiro.validate_orders([buy(5), buy(6)])[1],
+                         ['The notional of 60.00 EUR exceeds the available cash of 50.00 EUR'])
+        self.assertEqual(session.cash_requests, 1)
+
+    def test_cash_of_the_tracker(self):
+        session = TradingSession()
+        degiro = client(session)
+        tracker = UpdateTracker(degiro)
+        self.assertIs(degiro.tracker, tracker)
+        tracker.poll()
+        session.cash = 1000.0
+        # the cash followed by the tracker is used, it is not fetched again
+        self.assertTrue(degiro.validate_orders([buy(11)])[0])
+        self.assertEqual(session.cash_requests, 1)
+
+    def test_validator_cash_overrides(self):
+        session = TradingSession()
+        degiro = client(session)
+        degiro.order_validator.cash = {'EUR': 1000.0}
+        self.assertEqual(degiro.validate_orders([buy(11)]), [[]])
+        self.assertEqual(session.cash_requests, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import unittest
+
+from degiroapi import DeGiro, LoginError, SessionExpiredError, ServerError
+
+try:
+    from aiohttp import web
+    from degiroapi.aio import AsyncDeGiro
+except ImportError:
+    web = None
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data if data is not None else {}
+        self.text = str(self.data)
+        self.content = self.text.encode()
+        self.headers = {}
+        self.request = None
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    CLIENT_INFO = {'intAccount': 1, 'username': 'user', 'email': 'user@example.com',
+                   'firstContact': {'firstName': 'First', 'lastName': 'Last'}}
+
+    def __init__(self, login_status=200, client_info_status=200):
+        self.login_status = login_status
+        self.client_info_status = client_info_status
+        self.logins = 0
+        # the data requests of this session succeed, the others see an expired session
+        self.valid_session = None
+        self.lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        if '/login/secure/login' in url:
+            with self.lock:
+                self.logins += 1
+                logins = self.logins
+            if logins > 1 and self.login_status != 200:
+                return FakeResponse(self.login_status, {'status': 3})
+            return FakeResponse(200, {'sessionId': f'session{logins}'})
+        return FakeResponse(401)
+
+    def get(self, url, **kwargs):
+        if '/pa/secure/client' in url:
+            status = self.client_info_status if self.logins > 1 else 200
+            return FakeResponse(status, {'data': FakeSession.CLIENT_INFO})
+        if '/login/secure/config' in url:
+            return FakeResponse(200, {'data': {'clientId': 7}})
+        if self.valid_session is not None and url.endswith('jsessionid=' + self.valid_session):
+            return FakeResponse(200, {})
+        return FakeResponse(401)
+
+
+def run_with_timeout(func, timeout=5):
+    result = {}
+
+    def target():
+        try:
+            result['value'] = func()
+        except Exception as error:
+            result['error'] = error
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError('The call did not return')
+    return result
+
+
+class SessionRenewalTest(unittest.TestCase):
+    def test_login_requests_do_not_renew_the_session(self):
+        # the client info request of the re-login answers 401, it must fail instead of waiting for the login lock
+        session = FakeSession(client_info_status=401)
+        degiro = DeGiro('user', 'password', session=session)
+        result = run_with_timeout(lambda: degiro.update({'portfolio': 0}))
+        self.assertIsInstance(result.get('error'), SessionExpiredError)
+        self.assertEqual(session.logins, 2)
+
+    def test_failed_renewal_is_shared_by_the_waiting_threads(self):
+        session = FakeSession(login_status=400)
+        degiro = DeGiro('user', 'password', session=session)
+        errors = []
+        barrier = threading.Barrier(50)
+
+        def request():
+            barrier.wait()
+            try:
+                degiro.update({'portfolio': 0})
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=request) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 50)
+        self.assertEqual(session.logins, 2)
+        self.assertTrue(any(isinstance(error, LoginError) for error in errors))
+
+    def test_failed_login_keeps_the_credentials(self):
+        # an unavailable login endpoint is not a rejection of the credentials, the next request logs in again
+        session = FakeSession(login_status=503)
+        degiro = DeGiro('user', 'password', session=session)
+        with self.assertRaises(ServerError):
+            degiro.update({'portfolio': 0})
+        session.login_status = 200
+        session.valid_session = 'session3'
+        self.assertEqual(degiro.update({'portfolio': 0}), {})
+        self.assertEqual(session.logins, 3)
+
+
+class FakeServer:
+    # the same answers as FakeSession, served over HTTP for AsyncDeGiro
+    def __init__(self, login_status=200, client_info_status=200):
+        self.login_status = login_status
+        self.client_info_status = client_info_status
+        self.logins = 0
+        self.valid_session = None
+
+    async def handle(self, request):
+        path = request.path
+        if path.startswith('/login/secure/login'):
+            self.logins += 1
+            if self.logins > 1 and self.login_status != 200:
+                return web.json_response({'status': 3}, status=self.login_status)
+            return web.json_response({'sessionId': f'session{self.logins}'})
+        if path == '/pa/secure/client':
+            status = self.client_info_status if self.logins > 1 else 200
+            return web.json_response({'data': FakeSession.CLIENT_INFO}, status=status)
+        if path == '/login/secure/config':
+            return web.json_response({'data': {'clientId': 7}})
+        if self.valid_session is not None and request.path.endswith('jsessionid=' + self.valid_session):
+            return web.json_response({})
+        return web.json_response({}, status=401)
+
+    async def client(self):
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        degiro = AsyncDeGiro(trader_url=f'http://127.0.0.1:{port}')
+        await degiro.login('user', 'password')
+        return degiro
+
+    async def close(self, degiro):
+        await degiro.close()
+        await self.runner.cleanup()
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncSessionRenewalTest(unittest.TestCase):
+    def test_login_requests_do_not_renew_the_session(self):
+        server = FakeServer(client_info_status=401)
+
+        async def run():
+            degiro = await server.client()
+            try:
+                with self.assertRaises(SessionExpiredError):
+                    await asyncio.wait_for(degiro.getdata('portfolio'), 5)
+            finally:
+                await server.close(degiro)
+
+        asyncio.run(run())
+        self.assertEqual(server.logins, 2)
+
+    def test_failed_renewal_is_shared_by_the_waiting_tasks(self):
+        server = FakeServer(login_status=400)
+
+        async def run():
+            degiro = await server.client()
+            try:
+                return await asyncio.gather(*[degiro.getdata('portfolio') for _ in range(50)],
+                                            return_exceptions=True)
+            finally:
+                await server.close(degiro)
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(error, Exception) for error in errors))
+        self.assertTrue(any(isinstance(error, LoginError) for error in errors))
+        self.assertEqual(server.logins, 2)
+
+    def test_failed_login_keeps_the_credentials(self):
+        server = FakeServer(login_status=503)
+
+        async def run():
+            degiro = await server.client()
+            try:
+                with self.assertRaises(ServerError):
+                    await degiro.getdata('orders')
+                server.login_status = 200
+                server.valid_session = 'session3'
+                return await degiro.getdata('orders')
+            finally:
+                await server.close(degiro)
+
+        self.assertEqual(asyncio.run(run()), {})
+        self.assertEqual(server.logins, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()